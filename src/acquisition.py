@@ -0,0 +1,244 @@
+import threading
+import time
+import numpy as np
+
+class IQRingBuffer:
+    def __init__(self, capacity=16 * 256 * 1024, dtype=np.complex64):
+        self.capacity = int(capacity)
+        self.buffer = np.zeros(self.capacity, dtype=dtype)
+        self.write_seq = 0  # Absolute index of the next sample to be written
+        # End of the block being copied in; samples from writing_seq - capacity
+        # on are being overwritten before write_seq moves past them
+        self.writing_seq = 0
+        self.blocks_written = 0
+        self.overruns = 0  # Reads that found their data already overwritten
+        self.dropped_samples = 0  # Samples overwritten before a reader got to them
+        self.cond = threading.Condition()
+
+    def write(self, samples):
+        """Copy a block of samples into the ring"""
+        samples = np.asarray(samples)
+        n = len(samples)
+        if n > self.capacity:
+            # Only the newest capacity samples can be kept
+            samples = samples[-self.capacity:]
+            start_seq = self.write_seq + n - self.capacity
+            n = self.capacity
+        else:
+            start_seq = self.write_seq
+
+        with self.cond:
+            # Publish the region about to be overwritten before touching it
+            self.writing_seq = start_seq + n
+
+        start = start_seq % self.capacity
+        first = min(n, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        if first < n:
+            self.buffer[:n - first] = samples[first:]
+
+        with self.cond:
+            self.write_seq = start_seq + n
+            self.blocks_written += 1
+            self.cond.notify_all()
+
+    def oldest_seq(self):
+        """Oldest sequence number still held in the ring (and not being overwritten)"""
+        return max(0, self.writing_seq - self.capacity)
+
+    def available(self, seq):
+        """Number of samples readable starting at seq"""
+        return self.write_seq - max(seq, self.oldest_seq())
+
+    def wait_for(self, seq, timeout=None):
+        """Block until the sample at seq - 1 has been written"""
+        with self.cond:
+            return self.cond.wait_for(lambda: self.write_seq >= seq, timeout)
+
+    def read(self, seq, num_samples, out=None):
+        """Copy num_samples starting at seq into out.
+
+        Returns (samples, seq) where seq is the position actually read from.
+        If the requested data was overwritten the read is moved forward to
+        the oldest data still held and the loss is counted. Returns
+        (None, seq) if not enough samples have been written yet.
+        """
+        num_samples = min(int(num_samples), self.capacity)
+        write_seq = self.write_seq
+        oldest = self.oldest_seq()
+        if seq < oldest:
+            self.overruns += 1
+            self.dropped_samples += oldest - seq
+            seq = oldest
+        if write_seq - seq < num_samples:
+            return None, seq
+
+        if out is None:
+            out = np.empty(num_samples, dtype=self.buffer.dtype)
+        start = seq % self.capacity
+        first = min(num_samples, self.capacity - start)
+        out[:first] = self.buffer[start:start + first]
+        if first < num_samples:
+            out[first:num_samples] = self.buffer[:num_samples - first]
+
+        # The writer may have lapped us while copying
+        if self.oldest_seq() > seq:
+            lost = self.oldest_seq() - seq
+            self.overruns += 1
+            self.dropped_samples += lost
+            return self.read(seq + lost, num_samples, out)
+
+        return out[:num_samples], seq
+
+    def views(self, seq, num_samples):
+        """Views of the ring holding num_samples from seq, without copying.
+
+        Returns one or two arrays (two when the range wraps), or None if
+        the range isn't fully written yet or has already been overwritten.
+        The views alias the ring: check overwritten_since(seq) after using
+        them to know the data wasn't replaced meanwhile.
+        """
+        num_samples = int(num_samples)
+        if num_samples > self.capacity or seq + num_samples > self.write_seq or seq < self.oldest_seq():
+            return None
+        start = seq % self.capacity
+        first = min(num_samples, self.capacity - start)
+        views = [self.buffer[start:start + first]]
+        if first < num_samples:
+            views.append(self.buffer[:num_samples - first])
+        return views
+
+    def overwritten_since(self, seq):
+        """True if the sample at seq is no longer in the ring"""
+        return seq < self.oldest_seq()
+
+    def latest(self, num_samples, out=None):
+        """Copy the most recent num_samples from the ring"""
+        seq = self.write_seq - min(int(num_samples), self.capacity)
+        return self.read(max(seq, 0), num_samples, out)
+
+    def reader(self):
+        """Create a reader positioned at the current write position"""
+        return RingReader(self)
+
+    def get_stats(self):
+        """Get buffer counters"""
+        return {
+            'capacity': self.capacity,
+            'write_seq': self.write_seq,
+            'blocks_written': self.blocks_written,
+            'overruns': self.overruns,
+            'dropped_samples': self.dropped_samples,
+        }
+
+class RingReader:
+    def __init__(self, ring):
+        self.ring = ring
+        self.seq = ring.write_seq
+        self.samples_read = 0
+        self.dropped_samples = 0
+        self.skipped_samples = 0
+
+    def read(self, num_samples, out=None, timeout=None):
+        """Read the next num_samples in sequence, waiting if necessary"""
+        if timeout is not None and not self.ring.wait_for(self.seq + num_samples, timeout):
+            return None
+        samples, seq = self.ring.read(self.seq, num_samples, out)
+        self.dropped_samples += seq - self.seq
+        self.seq = seq
+        if samples is None:
+            return None
+        self.seq += len(samples)
+        self.samples_read += len(samples)
+        return samples
+
+    def read_latest(self, num_samples, out=None):
+        """Read the newest num_samples, skipping anything older"""
+        samples, seq = self.ring.latest(num_samples, out)
+        if samples is None:
+            return None
+        if seq > self.seq:
+            self.skipped_samples += seq - self.seq
+        self.seq = seq + len(samples)
+        self.samples_read += len(samples)
+        return samples
+
+    def lag(self):
+        """Samples written but not yet read by this reader"""
+        return self.ring.write_seq - self.seq
+
+class AcquisitionThread(threading.Thread):
+    def __init__(self, source, ring, block_size=256*1024, realtime=True):
+        super().__init__(name="acquisition", daemon=True)
+        self.source = source
+        self.ring = ring
+        self.block_size = block_size
+        self.realtime = realtime  # Pace to the sample rate (for sources that don't block)
+        self.running = threading.Event()
+        self.blocks = 0
+        self.samples = 0
+        self.errors = 0
+        self.late_blocks = 0  # Blocks produced after their real-time deadline
+        self.start_time = None
+        self.end_time = None
+        self.finished = False  # The source reached the end of its stream
+
+    def run(self):
+        self.running.set()
+        self.start_time = time.monotonic()
+        deadline = self.start_time
+        
+        # Sources that can fill a buffer in place avoid a per-block allocation
+        block = np.empty(self.block_size, dtype=self.ring.buffer.dtype)
+        read_into = getattr(self.source, 'read_samples', None)
+        
+        while self.running.is_set():
+            if read_into is not None:
+                samples = read_into(block)
+            else:
+                samples = self.source.get_samples(self.block_size)
+            if samples is None:
+                if getattr(self.source, 'eof', False):
+                    # End of a non-looping file: nothing more will come
+                    self.finished = True
+                    self.end_time = time.monotonic()
+                    print("Acquisition finished: end of stream")
+                    return
+                self.errors += 1
+                time.sleep(0.01)
+                continue
+
+            self.ring.write(samples)
+            self.blocks += 1
+            self.samples += len(samples)
+
+            if self.realtime and not getattr(self.source, 'paced', False):
+                deadline += len(samples) / self.source.sample_rate
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    self.late_blocks += 1
+                    if delay < -1.0:
+                        # Don't try to catch up after a long stall
+                        deadline = time.monotonic()
+
+    def stop(self, timeout=1.0):
+        """Stop acquisition and wait for the thread to exit"""
+        self.running.clear()
+        if self.is_alive():
+            self.join(timeout)
+
+    def get_stats(self):
+        """Get acquisition counters including the ring buffer state"""
+        elapsed = (self.end_time or time.monotonic()) - self.start_time if self.start_time else 0
+        stats = self.ring.get_stats()
+        stats.update({
+            'blocks': self.blocks,
+            'samples': self.samples,
+            'errors': self.errors,
+            'late_blocks': self.late_blocks,
+            'finished': self.finished,
+            'sample_rate': self.samples / elapsed if elapsed > 0 else 0.0,
+        })
+        return stats
@@ -0,0 +1,114 @@
+import argparse
+import os
+import time
+import numpy as np
+from src.signal_database import SignalDatabase
+
+START = np.datetime64('2026-01-01T00:00:00', 'us')
+
+def _timestamps(offsets_us):
+    """Stored timestamp text for microsecond offsets from START"""
+    text = np.datetime_as_string(START + offsets_us.astype('timedelta64[us]'), unit='us')
+    return np.char.replace(text, 'T', ' ').tolist()
+
+def populate(db, rows, signals, days, chunk=500000, seed=0):
+    """Fill db with random signals and time-ordered measurements of them"""
+    rng = np.random.default_rng(seed)
+    span_us = int(days * 86400e6)
+    freqs = rng.uniform(24e6, 1.7e9, signals)
+    widths = rng.uniform(1e3, 1e6, signals)
+    first = np.sort(rng.integers(0, span_us // 2, signals))
+    db.add_signals_bulk(zip([f"Signal_{i}" for i in range(signals)], freqs.tolist(),
+                            widths.tolist(), rng.uniform(-90, -20, signals).tolist(),
+                            ['FM'] * signals, [''] * signals, _timestamps(first)))
+
+    t0 = time.perf_counter()
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        ids = rng.integers(0, signals, n)
+        offsets = np.sort(rng.integers(span_us * start // rows, span_us * (start + n) // rows, n))
+        freq = freqs[ids] + rng.uniform(-0.5, 0.5, n) * widths[ids]
+        power = rng.uniform(-100, -20, n)
+        db.add_measurements_bulk(zip((ids + 1).tolist(), freq.tolist(), power.tolist(),
+                                     _timestamps(offsets)))
+        done = start + n
+        print(f"\r{done:,} rows, {done / (time.perf_counter() - t0):,.0f} rows/s", end="", flush=True)
+    print()
+
+def timed(func, repeat):
+    """Median seconds of func() over repeat runs, and its last result"""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times)), result
+
+def main():
+    """Time the indexed range queries on a large synthetic database"""
+    parser = argparse.ArgumentParser(description="SignalDatabase query benchmark")
+    parser.add_argument('--path', default='benchmark.db')
+    parser.add_argument('--rows', type=int, default=10_000_000, help="Measurements to generate")
+    parser.add_argument('--signals', type=int, default=100_000)
+    parser.add_argument('--days', type=float, default=30)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--keep', action='store_true',
+                        help="Keep a newly generated database for later runs")
+    args = parser.parse_args()
+
+    existed = os.path.exists(args.path)
+    db = SignalDatabase(args.path)
+    conn = db.db.reader()
+    if conn.execute("SELECT count(*) FROM signals").fetchone()[0] == 0:
+        populate(db, args.rows, args.signals, args.days)
+    rows = conn.execute("SELECT max(id) FROM measurements").fetchone()[0]
+    print(f"{args.path}: {rows:,} measurements, {os.path.getsize(args.path) / 1e6:,.0f} MB")
+
+    rng = np.random.default_rng(1)
+    signal_id = int(rng.integers(1, args.signals))
+    mid = START + np.timedelta64(int(args.days * 43200e6), 'us')
+    window = (str(mid).replace('T', ' '), str(mid + np.timedelta64(60, 's')).replace('T', ' '))
+    day = (str(mid).replace('T', ' '), str(mid + np.timedelta64(1, 'D')).replace('T', ' '))
+    band = (433.0e6, 434.0e6)
+
+    # (name, indexed query, the same without its index)
+    queries = [
+        ("signals in a 1 MHz band",
+         lambda: db.search_signals({'freq_min': band[0], 'freq_max': band[1]}),
+         lambda: conn.execute("SELECT * FROM signals NOT INDEXED WHERE frequency >= ? "
+                              "AND frequency <= ?", band).fetchall()),
+        ("measurements of one signal",
+         lambda: db.get_measurements(signal_id),
+         lambda: conn.execute("SELECT * FROM measurements NOT INDEXED WHERE signal_id = ?",
+                              (signal_id,)).fetchall()),
+        ("one signal over one day",
+         lambda: db.get_measurements(signal_id, *day),
+         lambda: conn.execute("SELECT * FROM measurements NOT INDEXED WHERE signal_id = ? "
+                              "AND timestamp >= ? AND timestamp <= ?",
+                              (signal_id, *day)).fetchall()),
+        ("measurements in a 1 minute window",
+         lambda: conn.execute("SELECT count(*) FROM measurements WHERE timestamp >= ? "
+                              "AND timestamp <= ?", window).fetchall(),
+         lambda: conn.execute("SELECT count(*) FROM measurements NOT INDEXED WHERE "
+                              "timestamp >= ? AND timestamp <= ?", window).fetchall()),
+        ("active in band during one day (R*Tree)",
+         lambda: db.find_active(band[0], band[1], *day),
+         lambda: conn.execute("SELECT DISTINCT s.id FROM signals s JOIN measurements m "
+                              "NOT INDEXED ON m.signal_id = s.id WHERE m.frequency <= ? "
+                              "AND m.frequency >= ? AND m.timestamp >= ? AND m.timestamp <= ?",
+                              (band[1], band[0], *day)).fetchall()),
+    ]
+    print(f"{'query':<42}{'indexed':>12}{'scan':>12}{'rows':>8}")
+    for name, indexed, scan in queries:
+        fast, result = timed(indexed, args.repeat)
+        slow, _ = timed(scan, 1)
+        print(f"{name:<42}{fast * 1e3:>10.2f}ms{slow * 1e3:>10.0f}ms{len(result):>8}")
+
+    db.close()
+    if not (args.keep or existed):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.path + suffix):
+                os.remove(args.path + suffix)
+
+if __name__ == "__main__":
+    main()
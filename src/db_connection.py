@@ -0,0 +1,94 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Applied to every connection; journal_mode is persistent and set once
+PRAGMAS = {
+    'synchronous': 'NORMAL',  # WAL makes this safe: commits survive application crashes
+    'temp_store': 'MEMORY',
+}
+
+class ConnectionManager:
+    """Long-lived SQLite connections for one database file.
+
+    All writes go through a single writer connection, serialised by a lock
+    and grouped into explicit transactions. The database runs in WAL mode,
+    so each thread gets its own reader connection and reads don't block
+    behind writes. Statements are compiled once per connection and reused
+    from sqlite3's statement cache, so callers should pass the same SQL
+    text with parameters rather than formatting values into it.
+    """
+    def __init__(self, db_path, mmap_size=256 * 1024 * 1024, cache_size_kb=64 * 1024,
+                 cached_statements=256, wal_autocheckpoint=10000):
+        self.db_path = db_path
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.cached_statements = cached_statements
+        # Pages of WAL before a commit copies them back into the database;
+        # index inserts scatter writes, so fewer, larger checkpoints are cheaper
+        self.wal_autocheckpoint = wal_autocheckpoint
+        self.memory = db_path == ':memory:'
+        self.lock = threading.RLock()
+        self.local = threading.local()
+        self.readers = []
+        self.writer = self._connect()
+        if not self.memory:
+            self.writer.execute("PRAGMA journal_mode=WAL")
+            self.writer.execute(f"PRAGMA wal_autocheckpoint={int(self.wal_autocheckpoint)}")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None,
+                               cached_statements=self.cached_statements)
+        for name, value in PRAGMAS.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size={-int(self.cache_size_kb)}")
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of writes as one transaction on the writer connection"""
+        with self.lock:
+            conn = self.writer
+            if conn.in_transaction:
+                # Nested use joins the outer transaction
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def reader(self):
+        """This thread's read connection"""
+        if self.memory:
+            # An in-memory database only exists on its one connection
+            return self.writer
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+            self.local.conn = conn
+            with self.lock:
+                self.readers.append(conn)
+        return conn
+
+    def checkpoint(self):
+        """Fold the WAL back into the database file"""
+        with self.lock:
+            self.writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self.lock:
+            for conn in self.readers:
+                conn.close()
+            self.readers = []
+            self.local = threading.local()
+            if self.writer is not None:
+                # Refresh planner statistics for tables that changed a lot
+                self.writer.execute("PRAGMA optimize")
+                self.writer.close()
+                self.writer = None
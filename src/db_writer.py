@@ -0,0 +1,204 @@
+import threading
+import time
+from collections import deque
+from src.signal_database import timestamp_now
+
+OVERFLOW_POLICIES = ('drop_newest', 'drop_oldest', 'block')
+
+class DatabaseWriter:
+    """Write-behind queue in front of a SignalDatabase.
+
+    add_signal() and add_measurement() only append a row to an in-memory
+    queue and return at once; a background thread drains the queue into
+    the database in batched transactions, committing when batch_rows rows
+    are waiting or flush_interval seconds after the oldest of them was
+    queued. Rows are timestamped when queued, not when written.
+
+    The queue holds at most max_rows rows. When it is full, overflow
+    decides what gives: 'drop_newest' rejects the new row, 'drop_oldest'
+    discards the oldest queued row to make room, and 'block' makes the
+    caller wait (up to block_timeout seconds, then the row is dropped).
+    Dropped rows are counted. flush() waits until everything queued so far
+    is committed; close() flushes and stops the thread.
+
+    With retention_days set, the thread also compacts raw measurements
+    older than that into the rollups every compact_interval seconds.
+    """
+    def __init__(self, database, max_rows=100000, batch_rows=1000, flush_interval=0.5,
+                 overflow='drop_newest', block_timeout=1.0, retention_days=None,
+                 compact_interval=3600.0):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.database = database
+        self.max_rows = max_rows
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.retention_days = retention_days
+        self.compact_interval = compact_interval
+        self.next_compact = time.monotonic()
+
+        self.queue = deque()  # (kind, row, time queued)
+        self.cond = threading.Condition()
+        self.enqueued = 0  # Rows accepted so far
+        self.committed = 0  # Rows accepted and since written or discarded
+        self.flush_target = 0  # committed count a pending flush() waits for
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="db_writer", daemon=True)
+
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.write_errors = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.last_batch_time = 0.0  # Seconds spent in the last transaction
+        self.last_latency = 0.0  # Queue-to-commit delay of the oldest row in the last batch
+        self.max_latency = 0.0
+        self.rows_compacted = 0
+        self.thread.start()
+
+    def add_signal(self, name, frequency, bandwidth, power, modulation="Unknown", description=""):
+        """Queue a signal; returns False if it was dropped"""
+        return self._put('signal', (name, float(frequency), float(bandwidth), float(power),
+                                    modulation, description, timestamp_now()))
+
+    def add_measurement(self, signal_id, frequency, power):
+        """Queue a measurement; returns False if it was dropped"""
+        return self._put('measurement', (int(signal_id), float(frequency), float(power), timestamp_now()))
+
+    def _put(self, kind, row):
+        with self.cond:
+            if not self.running:
+                raise RuntimeError("DatabaseWriter is closed")
+            if len(self.queue) >= self.max_rows:
+                if self.overflow == 'drop_oldest':
+                    self.queue.popleft()
+                    self.rows_dropped += 1
+                    self.committed += 1
+                elif self.overflow == 'block':
+                    self.cond.wait_for(lambda: len(self.queue) < self.max_rows or not self.running,
+                                       self.block_timeout)
+                if len(self.queue) >= self.max_rows or not self.running:
+                    self.rows_dropped += 1
+                    return False
+            self.queue.append((kind, row, time.monotonic()))
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self.queue))
+            if len(self.queue) == 1 or len(self.queue) >= self.batch_rows:
+                # Start the flush timer, or a full batch is ready
+                self.cond.notify_all()
+            return True
+
+    def _take_batch(self):
+        """Wait until a batch is due and take it off the queue"""
+        with self.cond:
+            while True:
+                if not self.queue:
+                    if not self.running:
+                        return None
+                    if self._compact_due():
+                        return []
+                    self.cond.wait(self._compact_wait())
+                    continue
+                due = self.queue[0][2] + self.flush_interval
+                wait = due - time.monotonic()
+                if (len(self.queue) >= self.batch_rows or wait <= 0 or not self.running
+                        or self.committed < self.flush_target):
+                    break
+                self.cond.wait(wait)
+            count = min(len(self.queue), self.batch_rows)
+            batch = [self.queue.popleft() for _ in range(count)]
+            self.cond.notify_all()  # Room for blocked producers
+            return batch
+
+    def _compact_due(self):
+        return self.retention_days is not None and time.monotonic() >= self.next_compact
+
+    def _compact_wait(self):
+        if self.retention_days is None:
+            return None
+        return max(0.0, self.next_compact - time.monotonic())
+
+    def _compact(self):
+        self.next_compact = time.monotonic() + self.compact_interval
+        try:
+            deleted = self.database.compact(self.retention_days)
+        except Exception as e:
+            print(f"Error compacting database: {e}")
+            return
+        with self.cond:
+            self.rows_compacted += deleted
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            if self._compact_due():
+                self._compact()
+            if not batch:
+                continue
+            signals = [row for kind, row, _ in batch if kind == 'signal']
+            measurements = [row for kind, row, _ in batch if kind == 'measurement']
+            t0 = time.perf_counter()
+            try:
+                with self.database.db.transaction():
+                    if signals:
+                        self.database.add_signals_bulk(signals)
+                    if measurements:
+                        self.database.add_measurements_bulk(measurements)
+                written = len(batch)
+            except Exception as e:
+                self.write_errors += 1
+                written = 0
+                print(f"Error writing to database: {e}")
+            now = time.monotonic()
+            with self.cond:
+                self.last_batch_time = time.perf_counter() - t0
+                self.last_latency = now - batch[0][2]
+                self.max_latency = max(self.max_latency, self.last_latency)
+                self.rows_written += written
+                self.rows_dropped += len(batch) - written
+                self.batches += 1
+                self.committed += len(batch)
+                self.cond.notify_all()
+
+    def set_retention(self, days):
+        """Keep raw measurements for days (None keeps everything); compacts now"""
+        with self.cond:
+            self.retention_days = days
+            self.next_compact = time.monotonic()
+            self.cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Write everything queued so far; returns False on timeout"""
+        with self.cond:
+            target = self.enqueued
+            self.flush_target = max(self.flush_target, target)
+            self.cond.notify_all()
+            return self.cond.wait_for(lambda: self.committed >= target, timeout)
+
+    def close(self, timeout=5.0):
+        """Flush the queue and stop the writer thread"""
+        with self.cond:
+            if not self.running:
+                return
+            self.running = False
+            self.cond.notify_all()
+        self.thread.join(timeout)
+
+    def get_stats(self):
+        with self.cond:
+            return {
+                'queue_depth': len(self.queue),
+                'max_depth': self.max_depth,
+                'rows_written': self.rows_written,
+                'rows_dropped': self.rows_dropped,
+                'write_errors': self.write_errors,
+                'batches': self.batches,
+                'last_batch_time': self.last_batch_time,
+                'last_latency': self.last_latency,
+                'max_latency': self.max_latency,
+                'rows_compacted': self.rows_compacted,
+            }
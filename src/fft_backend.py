@@ -0,0 +1,109 @@
+import os
+import numpy as np
+import scipy.fft as sfft
+
+try:
+    import pyfftw
+    import pyfftw.builders
+except ImportError:
+    pyfftw = None
+
+class FFTBackend:
+    """Batched FFTs along the last axis"""
+    name = "base"
+
+    def __init__(self, workers=1):
+        self.workers = max(1, int(workers))
+
+    def fft(self, x, axis=-1):
+        raise NotImplementedError
+
+    def rfft(self, x, axis=-1):
+        raise NotImplementedError
+
+    def plan(self, shape, dtype, real=False):
+        """Return a callable computing the transform for arrays of this shape.
+
+        Backends that can precompute anything for a fixed shape do it here;
+        the others just return their transform function.
+        """
+        return self.rfft if real else self.fft
+
+    def describe(self):
+        return f"{self.name} ({self.workers} thread{'s' if self.workers > 1 else ''})"
+
+class NumpyBackend(FFTBackend):
+    name = "numpy"
+
+    def __init__(self, workers=1):
+        super().__init__(1)  # numpy.fft is single threaded
+
+    def fft(self, x, axis=-1):
+        return np.fft.fft(x, axis=axis)
+
+    def rfft(self, x, axis=-1):
+        return np.fft.rfft(x, axis=axis)
+
+class ScipyBackend(FFTBackend):
+    name = "scipy"
+
+    def fft(self, x, axis=-1):
+        return sfft.fft(x, axis=axis, workers=self.workers, overwrite_x=True)
+
+    def rfft(self, x, axis=-1):
+        return sfft.rfft(x, axis=axis, workers=self.workers, overwrite_x=True)
+
+class FFTWBackend(FFTBackend):
+    name = "fftw"
+
+    def __init__(self, workers=1, planner_effort='FFTW_MEASURE'):
+        if pyfftw is None:
+            raise RuntimeError("pyFFTW is not installed")
+        super().__init__(workers)
+        self.planner_effort = planner_effort
+        pyfftw.interfaces.cache.enable()
+
+    def fft(self, x, axis=-1):
+        return pyfftw.interfaces.numpy_fft.fft(x, axis=axis, threads=self.workers)
+
+    def rfft(self, x, axis=-1):
+        return pyfftw.interfaces.numpy_fft.rfft(x, axis=axis, threads=self.workers)
+
+    def plan(self, shape, dtype, real=False):
+        """Build an FFTW plan with aligned input/output arrays for this shape"""
+        template = pyfftw.empty_aligned(shape, dtype=dtype)
+        builder = pyfftw.builders.rfft if real else pyfftw.builders.fft
+        fftw = builder(template, axis=-1, threads=self.workers,
+                       planner_effort=self.planner_effort, avoid_copy=False)
+
+        def execute(x, axis=-1):
+            # Copies x into the plan's aligned input and reuses its output array
+            return fftw(x)
+        return execute
+
+BACKENDS = {
+    'numpy': NumpyBackend,
+    'scipy': ScipyBackend,
+    'fftw': FFTWBackend,
+}
+
+def available_backends():
+    """Names of the backends usable in this environment"""
+    names = ['numpy', 'scipy']
+    if pyfftw is not None:
+        names.append('fftw')
+    return names
+
+def create_backend(name='auto', workers=None):
+    """Create an FFT backend by name.
+
+    'auto' picks pyFFTW when installed and scipy.fft otherwise. workers
+    defaults to the number of CPUs.
+    """
+    if workers is None or workers <= 0:
+        workers = os.cpu_count() or 1
+    if name == 'auto':
+        name = 'fftw' if pyfftw is not None else 'scipy'
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown FFT backend: {name}")
+    return BACKENDS[name](workers)
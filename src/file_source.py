@@ -0,0 +1,200 @@
+import os
+import struct
+import time
+import numpy as np
+
+# Raw formats: (numpy dtype of one I or Q value, file extensions)
+RAW_FORMATS = {
+    'cf32': (np.float32, ('.cf32', '.fc32', '.cfile')),
+    'cs16': (np.int16, ('.cs16', '.sc16')),
+    'cu8': (np.uint8, ('.cu8', '.u8')),
+}
+
+# Lookup table mapping unsigned 8 bit samples to [-1, 1)
+CU8_LUT = ((np.arange(256, dtype=np.float32) - 127.5) / 128.0).astype(np.float32)
+
+def guess_format(path):
+    """Guess the IQ format from the file extension"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.wav':
+        return 'wav'
+    for name, (_, extensions) in RAW_FORMATS.items():
+        if ext in extensions:
+            return name
+    raise ValueError(f"Cannot determine IQ format of {path}; pass format explicitly")
+
+def parse_wav_header(path):
+    """Find the data chunk of a 2-channel WAV file.
+
+    Returns (format name, sample rate, data offset, data length in bytes).
+    """
+    with open(path, 'rb') as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError(f"{path} is not a WAV file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                audio_format, channels, rate, _, _, bits = struct.unpack('<HHIIHH', f.read(16))
+                f.seek(size - 16, os.SEEK_CUR)
+                if audio_format == 0xFFFE:
+                    # WAVE_FORMAT_EXTENSIBLE: the float/PCM distinction is
+                    # in the subformat GUID, use the bit depth instead
+                    audio_format = 3 if bits == 32 else 1
+                fmt = (audio_format, channels, rate, bits)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise ValueError(f"{path} has data before its fmt chunk")
+                audio_format, channels, rate, bits = fmt
+                if channels != 2:
+                    raise ValueError("IQ WAV files must have 2 channels")
+                if audio_format == 3 and bits == 32:
+                    name = 'cf32'
+                elif audio_format == 1 and bits == 16:
+                    name = 'cs16'
+                elif audio_format == 1 and bits == 8:
+                    name = 'cu8'
+                else:
+                    raise ValueError(f"Unsupported WAV sample format ({audio_format}, {bits} bit)")
+                # Some writers leave the size as 0 or 0xFFFFFFFF while streaming
+                available = os.path.getsize(path) - f.tell()
+                if size == 0 or size > available:
+                    size = available
+                return name, rate, f.tell(), size
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+class FileSource:
+    """Replays recorded IQ through the SDRController interface.
+
+    The file is memory mapped, so captures larger than RAM can be
+    replayed and only the pages being read are touched.
+    """
+    def __init__(self, path, format=None, sample_rate=None, loop=True, realtime=True):
+        self.path = path
+        self.loop = loop
+        self.realtime = realtime
+        self.paced = realtime  # Tells the acquisition thread not to pace again
+        self.center_freq = 100e6
+        self.gain = 'auto'
+        self.eof = False  # Reached the end of a non-looping file
+
+        offset, length = 0, None
+        format = format or guess_format(path)
+        if format == 'wav':
+            format, rate, offset, length = parse_wav_header(path)
+            sample_rate = sample_rate or rate
+        if format not in RAW_FORMATS:
+            raise ValueError(f"Unknown IQ format: {format}")
+        self.format = format
+        self.sample_rate = sample_rate or 2.4e6
+
+        dtype = np.dtype(RAW_FORMATS[format][0])
+        if length is None:
+            length = os.path.getsize(path) - offset
+        count = length // (2 * dtype.itemsize) * 2
+        self.data = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+        if format == 'cf32':
+            self.complex_view = self.data.view(np.complex64)
+        self.num_samples = count // 2
+        self.position = 0
+
+        self.pace_start = None
+        self.pace_samples = 0
+
+    def initialize(self):
+        return self.num_samples > 0
+
+    def seek(self, sample):
+        self.position = int(sample) % max(self.num_samples, 1)
+        self.eof = False  # Reached the end of a non-looping file
+
+    def _convert(self, start, stop, out):
+        """Convert samples start..stop of the file into out"""
+        if self.format == 'cf32':
+            out[:] = self.complex_view[start:stop]
+            return
+        raw = self.data[2 * start:2 * stop]
+        values = out.view(np.float32)
+        if self.format == 'cu8':
+            np.take(CU8_LUT, raw, out=values)
+        else:
+            np.multiply(raw, np.float32(1 / 32768), out=values, casting='unsafe')
+
+    def read_samples(self, out):
+        """Fill out (complex64) with the next samples, wrapping if looping.
+
+        Returns the filled part of out, or None at the end of a non-looping
+        file.
+        """
+        if self.eof:
+            return None
+        n = len(out)
+        done = 0
+        while done < n:
+            chunk = min(n - done, self.num_samples - self.position)
+            self._convert(self.position, self.position + chunk, out[done:done + chunk])
+            done += chunk
+            self.position += chunk
+            if self.position >= self.num_samples:
+                if not self.loop:
+                    self.eof = True
+                    break
+                self.position = 0
+        self._pace(done)
+        return out[:done] if done else None
+
+    def get_samples(self, num_samples=256*1024):
+        """Get the next samples.
+
+        cf32 data that doesn't wrap is returned as a read-only view of the
+        memory map, without copying.
+        """
+        if self.format == 'cf32' and self.position + num_samples <= self.num_samples and not self.eof:
+            samples = self.complex_view[self.position:self.position + num_samples]
+            self.position += num_samples
+            if self.position == self.num_samples:
+                if self.loop:
+                    self.position = 0
+                else:
+                    self.eof = True
+            self._pace(num_samples)
+            return samples
+        return self.read_samples(np.empty(num_samples, dtype=np.complex64))
+
+    def _pace(self, num_samples):
+        """In real-time mode, sleep so samples are delivered at the sample rate"""
+        if not self.realtime:
+            return
+        now = time.monotonic()
+        if self.pace_start is None:
+            self.pace_start = now
+        self.pace_samples += num_samples
+        delay = self.pace_start + self.pace_samples / self.sample_rate - now
+        if delay > 0:
+            time.sleep(delay)
+        elif delay < -1.0:
+            # Fell far behind; restart the clock rather than bursting
+            self.pace_start = now
+            self.pace_samples = 0
+
+    def set_center_freq(self, freq):
+        self.center_freq = freq
+
+    def set_gain(self, gain):
+        self.gain = gain
+
+    def set_sample_rate(self, rate):
+        """Override the replay rate"""
+        self.sample_rate = rate
+        self.pace_start = None
+        self.pace_samples = 0
+
+    def close(self):
+        """Release the memory map"""
+        self.complex_view = None
+        self.data = None
@@ -0,0 +1,206 @@
+import queue
+import threading
+import time
+import numpy as np
+
+COALESCE_MODES = ('latest', 'max', 'mean')
+
+class FrameCoalescer:
+    """Hands spectrum frames from the processing thread to the display.
+
+    The producer pushes every frame; the display pulls at its own rate and
+    gets one frame standing for everything pushed since its last pull:
+    the newest one ('latest'), or their per-bin maximum ('max') or mean
+    power ('mean', averaged in linear power and returned in dB). Frames
+    pushed on a different frequency axis than the pending ones replace
+    them. Frames that never reach the screen on their own are counted
+    as coalesced.
+    """
+    def __init__(self, mode='latest'):
+        if mode not in COALESCE_MODES:
+            raise ValueError(f"Unknown coalesce mode: {mode}")
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.freq = None
+        self.accum = None
+        self.hold = None
+        self.pending = 0  # Frames pushed since the last pull
+        self.frames_produced = 0
+        self.frames_displayed = 0
+        self.frames_coalesced = 0
+
+    def push(self, freq, power, hold=None):
+        """Add a frame (copied, so the caller may reuse its buffers)"""
+        with self.lock:
+            if (self.freq is None or len(self.freq) != len(freq)
+                    or self.freq[0] != freq[0] or self.freq[-1] != freq[-1]):
+                # New axis (size or center frequency): frames pending on the
+                # old one can't be combined with this one
+                self.freq = np.array(freq)
+                if self.accum is None or len(self.accum) != len(power):
+                    self.accum = np.empty(len(power), dtype=np.float32)
+                self.frames_coalesced += self.pending
+                self.pending = 0
+
+            if self.mode == 'mean':
+                # Average power, not dB: sum linear power, convert back in pull()
+                linear = np.power(10.0, np.asarray(power, dtype=np.float32) / 10)
+                if self.pending == 0:
+                    self.accum[:] = linear
+                else:
+                    self.accum += linear
+            elif self.pending == 0 or self.mode == 'latest':
+                self.accum[:] = power
+            else:
+                np.maximum(self.accum, power, out=self.accum)
+
+            if hold is None:
+                self.hold = None
+            elif self.hold is None or len(self.hold) != len(hold):
+                self.hold = np.array(hold, dtype=np.float32)
+            else:
+                self.hold[:] = hold
+            self.pending += 1
+            self.frames_produced += 1
+
+    def pull(self, out=None):
+        """Frame for display as (freq, power, hold), or None if nothing is new.
+
+        power and hold are copies owned by the caller (written into out if
+        given).
+        """
+        with self.lock:
+            if self.pending == 0:
+                return None
+            if out is None or len(out) != len(self.accum):
+                out = np.empty_like(self.accum)
+            out[:] = self.accum
+            if self.mode == 'mean':
+                out /= self.pending
+                np.log10(out, out=out)
+                out *= 10
+            hold = None if self.hold is None else self.hold.copy()
+            self.frames_displayed += 1
+            self.frames_coalesced += self.pending - 1
+            self.pending = 0
+            return self.freq, out, hold
+
+    def set_mode(self, mode):
+        if mode not in COALESCE_MODES:
+            raise ValueError(f"Unknown coalesce mode: {mode}")
+        with self.lock:
+            self.mode = mode
+            self.pending = 0
+
+    def get_stats(self):
+        return {
+            'mode': self.mode,
+            'frames_produced': self.frames_produced,
+            'frames_displayed': self.frames_displayed,
+            'frames_coalesced': self.frames_coalesced,
+        }
+
+class ProcessingThread(threading.Thread):
+    """Turns every block of IQ from the ring into a spectrum frame.
+
+    Runs at the rate data arrives, independent of the display. Each frame
+    is passed to every consumer (detection, triggers, recording) on this
+    thread, then offered to the coalescer for display. Settings that touch
+    the processor's state should go through submit() so they are applied
+    between frames.
+    """
+    def __init__(self, reader, processor, coalescer, frame_size=64*1024):
+        super().__init__(name="processing", daemon=True)
+        self.reader = reader
+        self.processor = processor
+        self.coalescer = coalescer
+        self.frame_size = frame_size
+        self.consumers = []
+        self.block_consumers = []
+        self.commands = queue.SimpleQueue()
+        self.running = threading.Event()
+        self.frames = 0
+        self.consumer_errors = 0
+        self.frame_rate = 0.0
+        self.process_time = 0.0  # Seconds spent on the last frame
+
+    def add_consumer(self, consumer):
+        """Call consumer(freq, power, timestamp, seq) for every frame.
+
+        seq is the ring sequence number of the frame's first sample.
+        """
+        self.consumers.append(consumer)
+
+    def add_block_consumer(self, consumer):
+        """Call consumer(samples, seq, timestamp) with every raw IQ block.
+
+        Blocks are contiguous, so time-domain consumers see every sample.
+        """
+        self.block_consumers.append(consumer)
+
+    def submit(self, func, *args):
+        """Run func(*args) on the processing thread before the next frame"""
+        self.commands.put((func, args))
+
+    def _run_commands(self):
+        while True:
+            try:
+                func, args = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            func(*args)
+
+    def run(self):
+        self.running.set()
+        block = np.empty(self.frame_size, dtype=np.complex64)
+        rate_start, rate_frames = time.monotonic(), 0
+        while self.running.is_set():
+            self._run_commands()
+            samples = self.reader.read(self.frame_size, block, timeout=0.1)
+            if samples is None:
+                continue
+
+            t0 = time.perf_counter()
+            timestamp = time.time()
+            seq = self.reader.seq - len(samples)
+            for consumer in self.block_consumers:
+                try:
+                    consumer(samples, seq, timestamp)
+                except Exception as e:
+                    self.consumer_errors += 1
+                    print(f"Error in block consumer: {e}")
+            freq, _ = self.processor.compute_fft(samples)
+            power = self.processor.live_trace.data
+            for consumer in self.consumers:
+                try:
+                    consumer(freq, power, timestamp, seq)
+                except Exception as e:
+                    self.consumer_errors += 1
+                    print(f"Error in frame consumer: {e}")
+            hold = self.processor.hold_trace
+            self.coalescer.push(freq, power, hold.data if hold.enabled else None)
+            self.process_time = time.perf_counter() - t0
+
+            self.frames += 1
+            rate_frames += 1
+            now = time.monotonic()
+            if now - rate_start >= 1.0:
+                self.frame_rate = rate_frames / (now - rate_start)
+                rate_start, rate_frames = now, 0
+
+    def stop(self, timeout=1.0):
+        self.running.clear()
+        if self.is_alive():
+            self.join(timeout)
+
+    def get_stats(self):
+        stats = self.coalescer.get_stats()
+        stats.update({
+            'frames': self.frames,
+            'frame_rate': self.frame_rate,
+            'process_time': self.process_time,
+            'consumer_errors': self.consumer_errors,
+            'lag': self.reader.lag(),
+            'dropped_samples': self.reader.dropped_samples,
+        })
+        return stats
@@ -1,7 +1,8 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
-                            QTableWidget, QTableWidgetItem, QLabel, QLineEdit,
+                            QTableView, QAbstractItemView, QLabel, QLineEdit,
                             QFormLayout, QMessageBox)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
+from .signal_table_model import SignalTableModel
 
 class DatabaseViewer(QDialog):
     def __init__(self, signal_db, parent=None):
@@ -12,13 +13,25 @@ class DatabaseViewer(QDialog):
         
         layout = QVBoxLayout(self)
         
-        # Create signal table
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Name", "Frequency (MHz)", "Bandwidth (MHz)", 
-            "Power (dB)", "Modulation", "Description"
-        ])
+        # Filter applied in SQLite
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Filter:"))
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Name, modulation or description")
+        filter_layout.addWidget(self.filter_edit)
+        self.count_label = QLabel()
+        filter_layout.addWidget(self.count_label)
+        layout.addLayout(filter_layout)
+        
+        # Create signal table, loaded a page at a time as it scrolls
+        self.model = SignalTableModel(signal_db, parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.SortOrder.AscendingOrder)
         layout.addWidget(self.table)
         
         # Add control buttons
@@ -36,21 +49,31 @@ class DatabaseViewer(QDialog):
         btn_layout.addWidget(refresh_btn)
         layout.addLayout(btn_layout)
         
-        self.refresh_table()
+        # Wait for typing to pause before querying
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(300)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_edit.textChanged.connect(self.filter_timer.start)
+        
+        # Pick up signals saved while the dialog is open
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh_table)
+        self.refresh_timer.start(2000)
+        
+        self.update_count()
+        
+    def apply_filter(self):
+        self.model.set_filter(self.filter_edit.text().strip())
+        self.update_count()
+        
+    def update_count(self):
+        self.count_label.setText(f"Signals: {self.model.total}")
         
     def refresh_table(self):
-        """Refresh the signal table"""
-        signals = self.signal_db.get_signals()
-        self.table.setRowCount(len(signals))
-        
-        for i, signal in signals.iterrows():
-            self.table.setItem(i, 0, QTableWidgetItem(str(signal['id'])))
-            self.table.setItem(i, 1, QTableWidgetItem(signal['name']))
-            self.table.setItem(i, 2, QTableWidgetItem(f"{signal['frequency']:.3f}"))
-            self.table.setItem(i, 3, QTableWidgetItem(f"{signal['bandwidth']:.3f}"))
-            self.table.setItem(i, 4, QTableWidgetItem(f"{signal['power']:.1f}"))
-            self.table.setItem(i, 5, QTableWidgetItem(signal['modulation']))
-            self.table.setItem(i, 6, QTableWidgetItem(signal['description']))
+        """Add new signals to the table"""
+        if self.model.refresh():
+            self.update_count()
             
     def add_signal(self):
         """Add a new signal to database"""
@@ -71,12 +94,13 @@ class DatabaseViewer(QDialog):
                 
     def delete_signal(self):
         """Delete selected signal"""
-        current_row = self.table.currentRow()
+        current_row = self.table.currentIndex().row()
         if current_row >= 0:
-            signal_id = int(self.table.item(current_row, 0).text())
+            signal_id = self.model.signal_id(current_row)
             try:
                 self.signal_db.delete_signal(signal_id)
-                self.refresh_table()
+                self.model.remove_signal(current_row)
+                self.update_count()
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to delete signal: {str(e)}")
 
@@ -15,24 +15,30 @@ import pyqtgraph as pg
 import colorcet as cc
 from .spectrogram_view import SpectrogramView
 from .markers import Marker, MarkerType
-from src.signal_database import SignalDatabase
-from src.measurement_mask import MeasurementMask
+from .spectrum_renderer import BlitRenderer, PeakMarkers
+from .trace_decimator import TraceDecimator, reduce_max
+from src.signal_database import SignalDatabase, DEFAULT_DB_PATH
+from src.db_writer import DatabaseWriter
+from src.measurement_mask import MeasurementMask, MaskSet
 from src.trigger_system import TriggerSystem, TriggerType, TriggerMode
 from src.gui.database_viewer import DatabaseViewer
 from src.gui.mask_editor import MaskEditor
 from datetime import datetime
+import threading
 from src.demodulator import Demodulator
 from src.signal_analyzer import SignalAnalyzer
 from src.gui.mask_visualizer import MaskVisualizer
 from src.signal_processor import SignalProcessor
+from src.spectrum_history import SpectrumHistory
 import sounddevice as sd
 import wave
 import soundfile as sf
 from PyQt6 import QtCore
 
 class SpectrumAnalyzerWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, db_path=DEFAULT_DB_PATH):
         super().__init__()
+        self.db_path = db_path  # Signal database file
         self.setWindowTitle("SDR Spectrum Analyzer")
         self.setGeometry(100, 100, 1400, 900)
         
@@ -158,7 +164,9 @@ class SpectrumAnalyzerWindow(QMainWindow):
     def initialize_components(self):
         """Initialize all components and connections"""
         # Initialize data storage
-        self.waterfall_data = np.zeros((100, 1024))
+        self.waterfall_rows = 100
+        self.history_columns = 2048  # Wider traces are max-reduced to this
+        self.set_history(SpectrumHistory())
         
         # Initialize processors
         self.processor = SignalProcessor()
@@ -166,13 +174,19 @@ class SpectrumAnalyzerWindow(QMainWindow):
         self.analyzer = SignalAnalyzer()
         
         # Initialize systems
-        self.signal_db = SignalDatabase()
+        self.signal_db = SignalDatabase(self.db_path)
+        self.db_writer = DatabaseWriter(self.signal_db)
         self.measurement_mask = MeasurementMask("Default")
+        self.mask_set = MaskSet([self.measurement_mask])
         self.trigger_system = TriggerSystem()
         
         # Initialize state
         self.auto_track_peaks = False
         self.continuous_capture = False
+        self.mask_violation_frames = 0  # Since the last display update
+        self.trigger_count = 0
+        self.iq_capture = None
+        self.record_lock = threading.Lock()
         
         # Setup timer
         self.timer = QTimer()
@@ -363,6 +377,9 @@ class SpectrumAnalyzerWindow(QMainWindow):
         self.peak_label = QLabel("Peak: -40.0 dB")
         self.marker_label = QLabel("M1: 0.000 MHz")
         self.ref_level_label = QLabel("Ref: 0 dB")
+        self.buffer_label = QLabel("Acq: 0.00 MS/s")
+        self.fft_label = QLabel("FFT: -")
+        self.frame_label = QLabel("Frames: 0/s")
         
         # Add widgets to status bar
         self.status_bar.addPermanentWidget(self.freq_label)
@@ -370,6 +387,9 @@ class SpectrumAnalyzerWindow(QMainWindow):
         self.status_bar.addPermanentWidget(self.peak_label)
         self.status_bar.addPermanentWidget(self.marker_label)
         self.status_bar.addPermanentWidget(self.ref_level_label)
+        self.status_bar.addPermanentWidget(self.buffer_label)
+        self.status_bar.addPermanentWidget(self.frame_label)
+        self.status_bar.addPermanentWidget(self.fft_label)
 
     # Add new methods for toolbar actions
     def start_capture(self):
@@ -395,6 +415,41 @@ class SpectrumAnalyzerWindow(QMainWindow):
         self.bw_label.setText(f"BW: {self.span_spin.value():.1f} MHz")
         self.gain_label.setText(f"Gain: {self.gain_slider.value()} dB")
 
+    def set_sweep_range(self, start, stop):
+        """Show a swept range (MHz) instead of a single tuned span"""
+        self.center_freq_spin.setRange(0, max(2000, stop))
+        self.span_spin.setRange(0.001, max(100, stop - start))
+        self.center_freq_spin.setValue((start + stop) / 2)
+        self.span_spin.setValue(stop - start)
+
+    def set_fft_backend(self, description):
+        """Show the FFT backend chosen at startup"""
+        self.fft_label.setText(f"FFT: {description}")
+
+    def update_buffer_status(self, stats):
+        """Show acquisition ring buffer fill and loss counters"""
+        self.buffer_label.setText(
+            f"Acq: {stats['sample_rate']/1e6:.2f} MS/s | "
+            f"Overruns: {stats['overruns']} | Dropped: {stats['dropped_samples']} | "
+            f"Late: {stats['late_blocks']}" + (" | Finished" if stats.get('finished') else ""))
+
+    def update_frame_status(self, stats):
+        """Show processing versus display frame counters"""
+        text = (f"Frames: {stats['frame_rate']:.0f}/s | Shown: {stats['frames_displayed']} | "
+                f"Coalesced: {stats['frames_coalesced']}")
+        if 'iq_triggers' in stats:
+            text += f" | IQ triggers: {stats['iq_triggers']}"
+        db_stats = self.db_writer.get_stats()
+        if db_stats['queue_depth'] or db_stats['rows_dropped']:
+            text += f" | DB queue: {db_stats['queue_depth']} (dropped {db_stats['rows_dropped']})"
+        self.frame_label.setText(text)
+
+    def update_sweep_status(self, stats):
+        """Show sweep progress and timing"""
+        self.buffer_label.setText(
+            f"Sweep: {stats['num_hops']} hops | {stats['hop_rate']:.0f} hops/s | "
+            f"{stats['sweep_time']:.2f} s (stitch {stats['stitch_time']*1e3:.0f} ms)")
+
     def create_spectrum_plot(self, layout):
         # Create matplotlib figure for spectrum
         self.figure = Figure(figsize=(8, 4))
@@ -407,8 +462,25 @@ class SpectrumAnalyzerWindow(QMainWindow):
         # Initialize plot
         self.ax = self.figure.add_subplot(111)
         self.line, = self.ax.plot([], [])
-        self.peak_lines = []
-        
+        self.hold_line, = self.ax.plot([], [], color='#ffaa00', alpha=0.7)
+        self.peak_markers = PeakMarkers(self.ax, color='r', linestyle='--', alpha=0.5)
+        self.spectrum_extent = None
+        
+        # Full resolution trace; the plotted lines are min/max decimated to
+        # the axes' pixel width
+        self.trace_freq = np.empty(0)
+        self.trace_power = np.empty(0)
+        self.decimator = TraceDecimator()
+        self.hold_decimator = TraceDecimator()
+        
+        # Only the traces and peak markers change per frame; everything else
+        # is cached as the blit background
+        self.renderer = BlitRenderer(self.canvas, self.ax)
+        self.renderer.add_artist(self.line)
+        self.renderer.add_artist(self.hold_line)
+        self.renderer.add_artist(self.peak_markers.line)
+        
+        self.ax.set_ylim(-120, 0)
         self.ax.set_xlabel('Frequency (MHz)')
         self.ax.set_ylabel('Power (dB)')
         self.ax.grid(True)
@@ -474,8 +546,8 @@ class SpectrumAnalyzerWindow(QMainWindow):
             self, "Save Data", "", "CSV Files (*.csv);;All Files (*)")
         if filename:
             try:
-                freq = self.line.get_xdata()
-                power = self.line.get_ydata()
+                freq = self.trace_freq
+                power = self.trace_power
                 np.savetxt(filename, np.column_stack((freq, power)), 
                           delimiter=',', header='Frequency (MHz),Power (dB)')
             except Exception as e:
@@ -489,7 +561,8 @@ class SpectrumAnalyzerWindow(QMainWindow):
         if filename:
             try:
                 data = np.loadtxt(filename, delimiter=',', skiprows=1)
-                self.line.set_data(data[:, 0], data[:, 1])
+                self.trace_freq, self.trace_power = data[:, 0], data[:, 1]
+                self.line.set_data(*self.decimator.decimate(self.trace_freq, self.trace_power))
                 self.canvas.draw()
             except Exception as e:
                 self.show_error("Load Error", f"Failed to load data: {str(e)}")
@@ -497,8 +570,10 @@ class SpectrumAnalyzerWindow(QMainWindow):
     def clear_display(self):
         """Clear all display data"""
         self.line.set_data([], [])
-        self.waterfall_data.fill(0)
-        self.waterfall_img.setImage(self.waterfall_data)
+        self.trace_freq = np.empty(0)
+        self.trace_power = np.empty(0)
+        self.history.clear()
+        self.waterfall_img.setImage(self.history.view(self.waterfall_rows))
         self.canvas.draw()
 
     def show_error(self, title, message):
@@ -511,45 +586,85 @@ class SpectrumAnalyzerWindow(QMainWindow):
         if freq is None or power is None:
             return
             
-        self.line.set_data(freq/1e6, power)
+        freq_mhz = freq/1e6
+        self.trace_freq, self.trace_power = freq_mhz, power
+        
+        # Follow the trace's frequency range; changing limits needs a full redraw
+        extent = (freq_mhz[0], freq_mhz[-1])
+        if extent != self.spectrum_extent:
+            self.spectrum_extent = extent
+            self.ax.set_xlim(*extent)
+            self.renderer.invalidate()
+        
+        # Only the visible span (after zooming) is decimated and drawn
+        self.decimator.set_columns(self.ax.bbox.width)
+        self.line.set_data(*self.decimator.decimate(freq_mhz, power, self.ax.get_xlim()))
         
         # Update peak markers
-        self.update_peak_markers(freq/1e6, power)
+        self.update_peak_markers(freq_mhz, power)
         
         # Update measurements
-        self.update_measurements(freq/1e6, power)
+        self.update_measurements(freq_mhz, power)
         
-        # Update waterfall and spectrogram
-        self.update_waterfall(power)
-        self.spectrogram_view.update_spectrogram(power)
+        # Update the shared history, then the waterfall and spectrogram views of it
+        self.history.push(reduce_max(power, self.history_columns))
+        self.update_waterfall()
+        self.spectrogram_view.update_spectrogram()
         
-        # Check measurement mask if enabled
-        if self.measurement_mask.enabled:
-            violations = self.measurement_mask.check_violations(freq/1e6, power)
-            if violations:
-                self.status_bar.showMessage("Mask violation detected!", 2000)
+        # Mask violations are detected per frame in process_frame
+        if self.mask_violation_frames:
+            failed = ", ".join(f"{m['name']}: {m['frames_failed']}/{m['frames']} frames"
+                               for m in self.mask_set.summary() if not m['passed'])
+            self.status_bar.showMessage(f"Mask violation detected! ({failed})", 2000)
+            self.mask_violation_frames = 0
         
-        self.canvas.draw()
+        self.renderer.draw()
+        
+    def set_iq_capture(self, capture):
+        """Save raw IQ around every trigger with capture (an IQCapture)"""
+        self.iq_capture = capture
+
+    def process_frame(self, freq, power, timestamp, seq=None):
+        """Run detection, triggers and recording on one spectrum frame.
+
+        Called from the processing thread for every frame, including those
+        that are never displayed, so it must not touch widgets. seq is the
+        acquisition ring position of the frame's first sample.
+        """
+        if self.mask_set.evaluate(freq/1e6, power, timestamp).any():
+            self.mask_violation_frames += 1
+        fired = self.trigger_system.process([timestamp], freq, power)
+        self.trigger_count += len(fired)
+        if len(fired) and self.iq_capture is not None and seq is not None:
+            self.iq_capture.trigger(seq, timestamp, reason=self.trigger_system.type.value)
+        with self.record_lock:
+            if getattr(self, 'recording', False) and self.record_format == "Power Spectrum":
+                np.savetxt(self.record_file, np.column_stack((freq/1e6, power)), fmt=('%.6f', '%.2f'),
+                           delimiter=',')
+
+    def update_hold_trace(self, freq, hold):
+        """Update the hold trace (drawn with the next spectrum update)"""
+        if freq is None or hold is None:
+            self.hold_line.set_data([], [])
+        else:
+            self.hold_decimator.set_columns(self.ax.bbox.width)
+            self.hold_line.set_data(*self.hold_decimator.decimate(freq/1e6, hold, self.ax.get_xlim()))
         
     def update_peak_markers(self, freq, power):
-        # Find peaks
+        # Mark the strongest peaks, moving the existing marker line
         peaks = self.find_peaks(power)
-        
-        # Remove old peak markers
-        for line in self.peak_lines:
-            line.remove()
-        self.peak_lines = []
-        
-        # Add new peak markers
-        for peak in peaks:
-            line = self.ax.axvline(x=freq[peak], color='r', linestyle='--', alpha=0.5)
-            self.peak_lines.append(line)
+        strongest = peaks[np.argsort(power[peaks])[::-1]]
+        self.peak_markers.set_positions(freq[strongest])
             
-    def update_waterfall(self, power):
+    def set_history(self, history):
+        """Use history as the row store for the waterfall and spectrogram"""
+        self.history = history
+        self.spectrogram_view.set_history(history)
+
+    def update_waterfall(self):
         """Update waterfall with improved visualization"""
-        # Roll waterfall data
-        self.waterfall_data = np.roll(self.waterfall_data, 1, axis=0)
-        self.waterfall_data[0] = power
+        # Latest rows of the shared history, newest first (a view, not a copy)
+        data = self.history.view(self.waterfall_rows)
         
         # Get current frequency range
         center = self.center_freq_spin.value()
@@ -558,13 +673,13 @@ class SpectrumAnalyzerWindow(QMainWindow):
         stop = center + span/2
         
         # Calculate time range
-        time_range = np.arange(self.waterfall_data.shape[0]) * 0.05  # 50ms per row
+        time_range = np.arange(self.waterfall_rows) * 0.05  # 50ms per row
         
         # Update image with proper scaling
         self.waterfall_img.setImage(
-            self.waterfall_data,
+            data,
             autoLevels=False,
-            levels=(-100, 0),
+            levels=self.history.display_levels,
             rect=QtCore.QRectF(
                 start,          # left
                 0,             # top
@@ -578,12 +693,10 @@ class SpectrumAnalyzerWindow(QMainWindow):
         self.waterfall.setYRange(0, time_range[-1], padding=0)
 
     def find_peaks(self, power, threshold=-60):
-        # Simple peak finding
-        peaks = []
-        for i in range(1, len(power)-1):
-            if power[i] > threshold and power[i] > power[i-1] and power[i] > power[i+1]:
-                peaks.append(i)
-        return peaks
+        # Local maxima above the threshold
+        inner = power[1:-1]
+        is_peak = (inner > threshold) & (inner > power[:-2]) & (inner > power[2:])
+        return np.flatnonzero(is_peak) + 1
 
     def create_measurement_panel(self, parent_layout):
         """Create measurement panel"""
@@ -691,18 +804,17 @@ class SpectrumAnalyzerWindow(QMainWindow):
     def toggle_markers(self):
         """Toggle marker visibility"""
         self.show_markers = not getattr(self, 'show_markers', False)
-        if hasattr(self, 'peak_lines'):
-            for line in self.peak_lines:
-                line.set_visible(self.show_markers)
+        if hasattr(self, 'peak_markers'):
+            self.peak_markers.line.set_visible(self.show_markers)
         self.canvas.draw()
 
     def show_measurements(self):
         """Update measurement panel with current data"""
-        if not hasattr(self, 'line') or len(self.line.get_xdata()) == 0:
+        if not hasattr(self, 'line') or len(self.trace_freq) == 0:
             return
             
-        freq = self.line.get_xdata()
-        power = self.line.get_ydata()
+        freq = self.trace_freq
+        power = self.trace_power
         
         # Find peaks for markers
         peaks = self.find_peaks(power)
@@ -765,12 +877,12 @@ class SpectrumAnalyzerWindow(QMainWindow):
 
     def peak_search(self):
         """Find peaks and add markers"""
-        if not hasattr(self, 'line') or len(self.line.get_xdata()) == 0:
+        if not hasattr(self, 'line') or len(self.trace_freq) == 0:
             return
             
         self.clear_markers()
-        freq = self.line.get_xdata()
-        power = self.line.get_ydata()
+        freq = self.trace_freq
+        power = self.trace_power
         peaks = self.find_peaks(power)
         
         for peak_idx in peaks:
@@ -793,7 +905,9 @@ class SpectrumAnalyzerWindow(QMainWindow):
     def create_advanced_features(self):
         # Initialize systems
         self.signal_db = SignalDatabase()
+        self.db_writer = DatabaseWriter(self.signal_db)
         self.measurement_mask = MeasurementMask("Default")
+        self.mask_set = MaskSet([self.measurement_mask])
         self.trigger_system = TriggerSystem()
         
         # Create advanced features dock
@@ -883,6 +997,7 @@ class SpectrumAnalyzerWindow(QMainWindow):
 
     def show_database_viewer(self):
         """Show the database viewer dialog"""
+        self.db_writer.flush(timeout=2.0)  # So queued signals are listed
         viewer = DatabaseViewer(self.signal_db, self)
         viewer.exec()
     
@@ -893,11 +1008,11 @@ class SpectrumAnalyzerWindow(QMainWindow):
     
     def save_current_signal(self):
         """Save current signal to database"""
-        if not hasattr(self, 'line') or len(self.line.get_xdata()) == 0:
+        if not hasattr(self, 'line') or len(self.trace_freq) == 0:
             return
         
-        freq = self.line.get_xdata()
-        power = self.line.get_ydata()
+        freq = self.trace_freq
+        power = self.trace_power
         
         # Find main peak
         peak_idx = np.argmax(power)
@@ -907,16 +1022,17 @@ class SpectrumAnalyzerWindow(QMainWindow):
         # Estimate bandwidth
         bandwidth = self.estimate_bandwidth(freq, power, peak_idx)
         
-        try:
-            self.signal_db.add_signal(
-                name=f"Signal_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                frequency=peak_freq,
-                bandwidth=bandwidth,
-                power=peak_power
-            )
+        # Queued; the database write happens on the writer thread
+        saved = self.db_writer.add_signal(
+            name=f"Signal_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            frequency=peak_freq,
+            bandwidth=bandwidth,
+            power=peak_power
+        )
+        if saved:
             self.status_bar.showMessage("Signal saved to database", 2000)
-        except Exception as e:
-            self.show_error("Save Error", f"Failed to save signal: {str(e)}")
+        else:
+            self.show_error("Save Error", "Failed to save signal: database write queue is full")
         
     def estimate_bandwidth(self, freq, power, peak_idx, threshold_db=3):
         """Estimate signal bandwidth"""
@@ -970,7 +1086,7 @@ class SpectrumAnalyzerWindow(QMainWindow):
     def toggle_auto_classify(self, state):
         """Toggle auto classify"""
         self.auto_classify.setChecked(state)
-        self.update_measurements(self.line.get_xdata(), self.line.get_ydata())
+        self.update_measurements(self.trace_freq, self.trace_power)
 
     def update_measurements(self, freq, power):
         """Update all measurements"""
@@ -997,7 +1113,7 @@ class SpectrumAnalyzerWindow(QMainWindow):
 
     def start_demodulation(self):
         """Start audio demodulation"""
-        if not hasattr(self, 'line') or len(self.line.get_xdata()) == 0:
+        if not hasattr(self, 'line') or len(self.trace_freq) == 0:
             return
         
         samples = self.get_current_samples()
@@ -1724,6 +1840,7 @@ class SpectrumAnalyzerWindow(QMainWindow):
             else:  # Raw Data
                 self.record_file = open(f"{filename}.bin", 'wb')
                 
+            self.record_format = format_type
             self.recording = True
             self.record_start_time = datetime.now()
             self.update_record_time()
@@ -1743,12 +1860,10 @@ class SpectrumAnalyzerWindow(QMainWindow):
         """Stop recording data"""
         if hasattr(self, 'record_file'):
             try:
-                if isinstance(self.record_file, sf.SoundFile):
-                    self.record_file.close()
-                else:
+                with self.record_lock:
+                    self.recording = False
                     self.record_file.close()
                     
-                self.recording = False
                 if hasattr(self, 'record_timer'):
                     self.record_timer.stop()
                 
@@ -1779,8 +1894,8 @@ class SpectrumAnalyzerWindow(QMainWindow):
             if format_type == "IQ Data":
                 self.record_file.write(data)
             elif format_type == "Power Spectrum":
-                freq = self.line.get_xdata()
-                power = self.line.get_ydata()
+                freq = self.trace_freq
+                power = self.trace_power
                 for f, p in zip(freq, power):
                     self.record_file.write(f"{f:.6f},{p:.2f}\n")
             else:  # Raw Data
@@ -72,11 +72,11 @@ class MaskEditor(QDialog):
     def clear_points(self):
         """Clear all points"""
         self.table.setRowCount(0)
-        self.mask.points.clear()
+        self.mask.clear_points()
         
     def accept(self):
         """Save mask points when dialog is accepted"""
-        self.mask.points.clear()
+        self.mask.clear_points()
         for row in range(self.table.rowCount()):
             freq = float(self.table.item(row, 0).text())
             upper = float(self.table.item(row, 1).text())
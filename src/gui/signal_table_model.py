@@ -0,0 +1,149 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from src.signal_database import SIGNAL_COLUMNS
+
+def _text(value):
+    return "" if value is None else str(value)
+
+def _number(digits):
+    return lambda value: "" if value is None else f"{value:.{digits}f}"
+
+# (column in SIGNAL_COLUMNS, header, display format)
+COLUMNS = [
+    ('id', "ID", _text),
+    ('name', "Name", _text),
+    ('frequency', "Frequency (MHz)", _number(3)),
+    ('bandwidth', "Bandwidth (MHz)", _number(3)),
+    ('power', "Power (dB)", _number(1)),
+    ('modulation', "Modulation", _text),
+    ('description', "Description", _text),
+]
+_FIELDS = [SIGNAL_COLUMNS.index(key) for key, _, _ in COLUMNS]  # Tuple position per column
+
+class SignalTableModel(QAbstractTableModel):
+    """Signals table read from the database a page at a time.
+
+    Only the rows scrolled into view are loaded: the view asks for more
+    through canFetchMore()/fetchMore(), and each page is a keyset query
+    continuing after the last loaded row. Sorting and filtering run in
+    SQLite and restart from the first page. refresh() picks up signals
+    added since the last load (by id) and inserts those that fall within
+    the loaded rows at their sorted position; later ones arrive with the
+    pages still to be fetched.
+    """
+    def __init__(self, signal_db, page_size=500, parent=None):
+        super().__init__(parent)
+        self.signal_db = signal_db
+        self.page_size = page_size
+        self.criteria = {}
+        self.order_by = 'id'
+        self.descending = False
+        self.rows = []
+        self.exhausted = False
+        self.max_id = 0  # Highest id seen, for refresh()
+        self.total = 0  # Matching rows in the database
+        self._sort_index = SIGNAL_COLUMNS.index('id')
+        self.reload()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.rows[index.row()][_FIELDS[index.column()]]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return COLUMNS[index.column()][2](value)
+        if role == Qt.ItemDataRole.UserRole:
+            return value
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return COLUMNS[section][1]
+        return None
+
+    def signal_id(self, row):
+        return self.rows[row][0]
+
+    def _key(self, row):
+        return row[self._sort_index], row[0]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        after = self._key(self.rows[-1]) if self.rows else None
+        page = self.signal_db.get_signals_page(self.criteria, self.order_by, self.descending,
+                                               after, self.page_size)
+        self.exhausted = len(page) < self.page_size
+        if page:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+            self.max_id = max(self.max_id, max(row[0] for row in page))
+
+    def reload(self):
+        """Drop the loaded rows and start again from the first page"""
+        self.beginResetModel()
+        self.rows = []
+        self.exhausted = False
+        latest = self.signal_db.get_signals_page(order_by='id', descending=True, limit=1)
+        self.max_id = latest[0][0] if latest else 0
+        self.endResetModel()
+        self.total = self.signal_db.count_signals(self.criteria)
+        self.fetchMore()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.order_by = COLUMNS[column][0]
+        self._sort_index = SIGNAL_COLUMNS.index(self.order_by)
+        self.descending = order == Qt.SortOrder.DescendingOrder
+        self.reload()
+
+    def set_filter(self, text):
+        """Show only signals whose name, modulation or description contain text"""
+        self.criteria = {'text': text} if text else {}
+        self.reload()
+
+    def _before(self, a, b):
+        """Whether sort key a comes before b (NULLs first ascending, as SQLite)"""
+        a = (a[0] is not None, a[0], a[1])
+        b = (b[0] is not None, b[0], b[1])
+        return a > b if self.descending else a < b
+
+    def refresh(self):
+        """Add signals created since the last load; returns how many were added"""
+        new = self.signal_db.get_signals_page(self.criteria, 'id', False,
+                                              (self.max_id, self.max_id), -1)
+        if not new:
+            return 0
+        self.max_id = max(row[0] for row in new)
+        self.total += len(new)
+        last = self._key(self.rows[-1]) if self.rows else None
+        for row in sorted(new, key=lambda r: r[0]):
+            key = self._key(row)
+            if not self.exhausted and (last is None or not self._before(key, last)):
+                continue  # Past the loaded rows; fetchMore() will reach it
+            lo, hi = 0, len(self.rows)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._before(self._key(self.rows[mid]), key):
+                    lo = mid + 1
+                else:
+                    hi = mid
+            self.beginInsertRows(QModelIndex(), lo, lo)
+            self.rows.insert(lo, row)
+            self.endInsertRows()
+        return len(new)
+
+    def remove_signal(self, row):
+        """Drop a row after its signal was deleted from the database"""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.rows[row]
+        self.endRemoveRows()
+        self.total -= 1
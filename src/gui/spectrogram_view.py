@@ -3,9 +3,10 @@ import pyqtgraph as pg
 import numpy as np
 import colorcet as cc
 from PyQt6 import QtCore
+from src.spectrum_history import SpectrumHistory
 
 class SpectrogramView(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, history=None):
         super().__init__(parent)
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(0, 0, 0, 0)
@@ -35,9 +36,9 @@ class SpectrogramView(QWidget):
         )
         self.colorbar.setImageItem(self.img)
         
-        # Initialize data buffer with better size
+        # History rows are shared with the waterfall when a history is passed
         self.buffer_size = 1000
-        self.data_buffer = np.zeros((self.buffer_size, 1024))
+        self.history = history if history is not None else SpectrumHistory(self.buffer_size)
         
         # Add time axis labels
         self.time_axis = self.plot.getAxis('left')
@@ -62,11 +63,20 @@ class SpectrogramView(QWidget):
                                   color=colors)
         self.img.setLookupTable(self.colormap.getLookupTable())
         
-    def update_spectrogram(self, power_data):
-        """Update spectrogram with improved visualization"""
-        # Roll buffer and add new data
-        self.data_buffer = np.roll(self.data_buffer, 1, axis=0)
-        self.data_buffer[0] = power_data
+    def set_history(self, history):
+        """Draw from a history filled elsewhere"""
+        self.history = history
+
+    def update_spectrogram(self, power_data=None):
+        """Update spectrogram with improved visualization.
+
+        power_data is added to the history first; pass None when the
+        history is shared and has already been updated.
+        """
+        if power_data is not None:
+            self.history.push(power_data)
+        data = self.history.view(self.buffer_size)
+        levels = self.history.display_levels
         
         # Get frequency range from parent window
         if hasattr(self.parent(), 'center_freq_spin') and hasattr(self.parent(), 'span_spin'):
@@ -77,9 +87,9 @@ class SpectrogramView(QWidget):
             
             # Update image with proper scaling
             self.img.setImage(
-                self.data_buffer,
+                data,
                 autoLevels=False,
-                levels=(-100, 0),
+                levels=levels,
                 rect=QtCore.QRectF(
                     start,          # left
                     0,             # top
@@ -93,7 +103,7 @@ class SpectrogramView(QWidget):
             self.plot.setYRange(0, self.buffer_size)
         else:
             # Fallback if parent window not available
-            self.img.setImage(self.data_buffer, autoLevels=False, levels=(-100, 0))
+            self.img.setImage(data, autoLevels=False, levels=levels)
 
     def get_display_rect(self):
         """Get display rectangle based on current settings"""
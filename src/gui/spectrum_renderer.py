@@ -0,0 +1,71 @@
+import numpy as np
+
+class BlitRenderer:
+    """Redraws only the per-frame artists of a matplotlib axes.
+
+    The static parts of the plot (axes, grid, labels, markers from
+    markers.py) are rendered once into a cached background whenever the
+    canvas does a full draw. Each frame then restores that background,
+    draws the animated artists on top and blits the axes region, instead
+    of re-rendering the whole figure.
+    """
+    def __init__(self, canvas, ax):
+        self.canvas = canvas
+        self.ax = ax
+        self.artists = []
+        self.background = None
+        self.frames = 0
+        self.full_draws = 0
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def add_artist(self, artist):
+        """Register an artist that changes every frame"""
+        artist.set_animated(True)
+        self.artists.append(artist)
+        return artist
+
+    def invalidate(self):
+        """Force a full redraw on the next frame (e.g. after changing limits)"""
+        self.background = None
+
+    def _on_draw(self, event):
+        # Any full draw (resize, zoom, markers, limit changes) refreshes the
+        # cached background; animated artists are skipped by that draw so
+        # put them back on top
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.full_draws += 1
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            self.ax.draw_artist(artist)
+
+    def draw(self):
+        """Render one frame"""
+        self.frames += 1
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_artists()
+        self.canvas.blit(self.ax.bbox)
+
+class PeakMarkers:
+    """Vertical peak marker lines drawn as one NaN-separated Line2D.
+
+    Replaces creating and removing an axvline per peak each frame.
+    """
+    def __init__(self, ax, max_markers=20, **line_kwargs):
+        self.max_markers = max_markers
+        self.x = np.full(3 * max_markers, np.nan)
+        self.y = np.tile([0.0, 1.0, np.nan], max_markers)
+        # x in data coordinates, y spanning the full axes height
+        self.line, = ax.plot(self.x, self.y, transform=ax.get_xaxis_transform(), **line_kwargs)
+
+    def set_positions(self, positions):
+        """Show markers at the given x positions (extra positions are ignored)"""
+        n = min(len(positions), self.max_markers)
+        self.x[:] = np.nan
+        self.x[0:3 * n:3] = positions[:n]
+        self.x[1:3 * n:3] = positions[:n]
+        self.line.set_xdata(self.x)
@@ -1,3 +1,5 @@
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QProgressBar
+
 class StatusPanel(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -12,6 +14,7 @@ class StatusPanel(QWidget):
             "rbw": QLabel("RBW: 10 kHz"),
             "peak": QLabel("Peak: -40.0 dB"),
             "marker": QLabel("M1: 0.000 MHz"),
+            "fft": QLabel("FFT: numpy"),
         }
         
         # Add indicators to layout
@@ -40,4 +43,8 @@ class StatusPanel(QWidget):
                 background-color: #00aa00;
             }
         """)
-        layout.addWidget(self.buffer_status) 
\ No newline at end of file
+        layout.addWidget(self.buffer_status)
+        
+    def set_fft_backend(self, description):
+        """Show the active FFT backend and thread count"""
+        self.indicators["fft"].setText(f"FFT: {description}")
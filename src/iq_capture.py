@@ -0,0 +1,133 @@
+import os
+import queue
+import threading
+from datetime import datetime
+
+class IQCapture:
+    """Saves raw IQ from the acquisition ring around trigger events.
+
+    trigger() only queues a request. A background writer waits until the
+    post-trigger samples have arrived, then writes the pre + post window
+    straight from the ring to a .cf32 file: the file gets memoryviews of
+    the ring's own memory (two when the window wraps), with no
+    intermediate copy. If the start of the pre-trigger window has already
+    left the ring, the capture starts at the oldest sample held and is
+    marked incomplete. If acquisition laps the window while it is being
+    written, the file is rewritten from what the ring still holds, up to
+    write_attempts times, and otherwise deleted and counted as lost. Each
+    saved capture is recorded in the SignalDatabase.
+    """
+    def __init__(self, ring, source, database=None, directory="captures",
+                 pre_time=0.25, post_time=0.5, max_pending=16, write_attempts=3):
+        self.ring = ring
+        self.source = source  # For sample rate and center frequency
+        self.database = database
+        self.directory = directory
+        self.pre_time = pre_time
+        self.post_time = post_time
+        self.requests = queue.Queue(max_pending)
+        self.write_attempts = write_attempts
+        self.running = threading.Event()
+        self.thread = None
+
+        self.captures_written = 0
+        self.captures_incomplete = 0  # Written with a shortened pre-trigger window
+        self.captures_lost = 0  # Overwritten in the ring before they could be saved
+        self.captures_dropped = 0  # Triggers ignored because the queue was full
+        self.bytes_written = 0
+        self.last_path = None
+
+    def window_samples(self):
+        """(pre, post) window in samples, limited to what the ring can hold"""
+        rate = self.source.sample_rate
+        pre = int(self.pre_time * rate)
+        post = int(self.post_time * rate)
+        # Leave a quarter of the ring as margin for the time spent writing
+        limit = self.ring.capacity * 3 // 4
+        if pre + post > limit:
+            scale = limit / (pre + post)
+            pre, post = int(pre * scale), int(post * scale)
+        return pre, post
+
+    def trigger(self, seq, timestamp, reason=""):
+        """Capture around ring sample seq, which was taken at timestamp"""
+        pre, post = self.window_samples()
+        request = (seq, pre, post, timestamp, self.source.center_freq, self.source.sample_rate, reason)
+        try:
+            self.requests.put_nowait(request)
+        except queue.Full:
+            self.captures_dropped += 1
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.running.set()
+        self.thread = threading.Thread(target=self._run, name="iq_capture", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=2.0):
+        self.running.clear()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _run(self):
+        while self.running.is_set():
+            try:
+                request = self.requests.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                self._write(*request)
+            except OSError as e:
+                print(f"Error writing IQ capture: {e}")
+
+    def _write(self, seq, pre, post, timestamp, center_freq, sample_rate, reason):
+        # Wait for the post-trigger samples
+        end = seq + post
+        while not self.ring.wait_for(end, timeout=0.1):
+            if not self.running.is_set():
+                return
+
+        name = datetime.fromtimestamp(timestamp).strftime("capture_%Y%m%d_%H%M%S_%f.cf32")
+        path = os.path.join(self.directory, name)
+        for _ in range(self.write_attempts):
+            # Start as early as the ring still allows
+            start = max(seq - pre, self.ring.oldest_seq())
+            views = self.ring.views(start, end - start)
+            if views is None:
+                break
+            with open(path, 'wb') as f:
+                for view in views:
+                    f.write(memoryview(view))
+            if not self.ring.overwritten_since(start):
+                break
+            # Lapped while writing: the file's first samples are from a later
+            # pass of the ring, so start again from what is still held
+            views = None
+        if views is None:
+            if os.path.exists(path):
+                os.remove(path)
+            self.captures_lost += 1
+            print("IQ capture lost: ring overwritten before it could be saved")
+            return
+
+        # Only a clipped pre-trigger window makes a capture incomplete
+        complete = start == seq - pre
+        if not complete:
+            self.captures_incomplete += 1
+
+        self.captures_written += 1
+        self.bytes_written += (end - start) * self.ring.buffer.itemsize
+        self.last_path = path
+        if self.database is not None:
+            self.database.add_capture(path, timestamp, center_freq, sample_rate, end - start,
+                                      seq - start, reason=reason, complete=complete)
+
+    def get_stats(self):
+        return {
+            'captures_written': self.captures_written,
+            'captures_incomplete': self.captures_incomplete,
+            'captures_lost': self.captures_lost,
+            'captures_dropped': self.captures_dropped,
+            'captures_pending': self.requests.qsize(),
+            'bytes_written': self.bytes_written,
+        }
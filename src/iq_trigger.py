@@ -0,0 +1,131 @@
+import numpy as np
+
+class IQTrigger:
+    """Time-domain trigger on IQ magnitude with sample resolution.
+
+    A pulse starts when |x| rises above level_db (dBFS) and ends when it
+    falls below level_db - hysteresis; samples in between keep the
+    previous state, so noise around the threshold doesn't chatter. Pulses
+    shorter than min_width seconds are ignored. The trigger fires on the
+    rising edge (once the pulse has lasted min_width) or on the falling
+    edge of a long enough pulse.
+
+    Blocks are processed with array operations; the level state and an
+    unfinished pulse carry over to the next block, so results don't depend
+    on block boundaries. Events are reported as absolute sample indices,
+    which convert to timestamps with sample accuracy.
+    """
+    def __init__(self, sample_rate, level_db=-20.0, hysteresis=3.0, edge='rising', min_width=0.0):
+        self.sample_rate = sample_rate
+        self.edge = edge
+        self.set_level(level_db, hysteresis)
+        self.min_width = min_width
+        self.enabled = True
+        self.reset()
+
+    def set_level(self, level_db, hysteresis=None):
+        self.level_db = level_db
+        if hysteresis is not None:
+            self.hysteresis = hysteresis
+        # Compared against |x|^2 to avoid a square root per sample
+        self.high = 10 ** (self.level_db / 10)
+        self.low = 10 ** ((self.level_db - self.hysteresis) / 10)
+
+    def reset(self):
+        self.state = False  # Above the threshold at the end of the last block
+        self.pulse_start = None  # Start of the pulse still in progress
+        self.pulse_fired = False  # Whether that pulse already fired (rising mode)
+        self.next_index = 0  # Absolute index of the next sample
+        self.epoch = None  # Wall time of sample 0
+        self.trigger_count = 0
+        self.pulses = 0
+        self.mag2 = np.empty(0, dtype=np.float32)
+
+    def _magnitude_squared(self, samples):
+        n = len(samples)
+        if len(self.mag2) < n:
+            self.mag2 = np.empty(n, dtype=np.float32)
+        values = samples.view(np.float32)
+        mag2 = self.mag2[:n]
+        np.multiply(values[0::2], values[0::2], out=mag2)
+        mag2 += values[1::2] * values[1::2]
+        return mag2
+
+    def process(self, samples, start_index=None, timestamp=None):
+        """Run the trigger over a block of complex64 samples.
+
+        start_index is the absolute index of samples[0] (defaults to
+        continuing from the previous block); timestamp is the wall time of
+        the block's last sample, used to anchor sample times. Returns
+        (indices, widths): absolute sample index of each event and the
+        width in samples of its pulse (-1 for a rising-edge event whose
+        pulse hasn't ended yet).
+        """
+        if start_index is None:
+            start_index = self.next_index
+        n = len(samples)
+        if timestamp is not None and self.epoch is None:
+            self.epoch = timestamp - (start_index + n) / self.sample_rate
+        self.next_index = start_index + n
+        if not self.enabled or n == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        mag2 = self._magnitude_squared(samples)
+        # Samples that set the state: above high (1) or below low (0);
+        # anything in the hysteresis band keeps the previous state
+        above = mag2 > self.high
+        decided = np.flatnonzero(above | (mag2 < self.low))
+        levels = above[decided]
+        changes = np.flatnonzero(levels != np.concatenate(([self.state], levels[:-1])))
+        edges = decided[changes] + start_index
+        rising = levels[changes]
+
+        # Pair edges into pulses, including one carried in from the last block
+        starts = edges[rising]
+        ends = edges[~rising]
+        carried = self.pulse_start is not None
+        if carried:
+            starts = np.concatenate(([self.pulse_start], starts))
+        closed = len(ends)
+        widths = ends - starts[:closed]
+        self.pulses += closed
+
+        min_width = int(round(self.min_width * self.sample_rate))
+        if self.edge == 'rising':
+            # Fire at the start of each wide enough pulse, including a pulse
+            # still open at the end of the block if it's already long enough
+            fired_before = np.zeros(closed, dtype=bool)
+            if carried and closed:
+                fired_before[0] = self.pulse_fired
+            wide = (widths >= min_width) & ~fired_before
+            indices, event_widths = starts[:closed][wide], widths[wide]
+            if len(starts) > closed:
+                open_start = starts[-1]
+                open_fired = self.pulse_fired if (carried and closed == 0) else False
+                if not open_fired and self.next_index - open_start >= min_width:
+                    indices = np.append(indices, open_start)
+                    event_widths = np.append(event_widths, -1)
+                    open_fired = True
+                self.pulse_start, self.pulse_fired = open_start, open_fired
+            else:
+                self.pulse_start, self.pulse_fired = None, False
+        else:
+            wide = widths >= min_width
+            indices, event_widths = ends[wide], widths[wide]
+            self.pulse_start = starts[-1] if len(starts) > closed else None
+
+        if len(levels):
+            self.state = bool(levels[-1])
+        self.trigger_count += len(indices)
+        return indices, event_widths
+
+    def timestamps(self, indices):
+        """Wall times of absolute sample indices"""
+        epoch = self.epoch or 0.0
+        return epoch + np.asarray(indices) / self.sample_rate
+
+    def get_stats(self):
+        return {
+            'iq_triggers': self.trigger_count,
+            'pulses': self.pulses,
+        }
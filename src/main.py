@@ -1,32 +1,192 @@
 import sys
+import argparse
+import time
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import QTimer
 from src.gui.main_window import SpectrumAnalyzerWindow
 from src.sdr_controller import SDRController
 from src.signal_processor import SignalProcessor
+from src.acquisition import IQRingBuffer, AcquisitionThread
+from src.fft_backend import create_backend, available_backends
+from src.trace_engine import TraceMode
+from src.scenario import load_scenario
+from src.file_source import FileSource
+from src.rtl_tcp import RtlTcpSource
+from src.sweep import SweepScheduler, SweepThread
+from src.spectrum_history import SpectrumHistory, HISTORY_FORMATS
+from src.frame_pipeline import FrameCoalescer, ProcessingThread, COALESCE_MODES
+from src.iq_capture import IQCapture
+from src.iq_trigger import IQTrigger
+from src.signal_database import DEFAULT_DB_PATH
+
+HOLD_MODES = {
+    "Peak Hold": TraceMode.PEAK_HOLD,
+    "Max Hold": TraceMode.MAX_HOLD,
+    "Min Hold": TraceMode.MIN_HOLD,
+}
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="SDR Spectrum Analyzer")
+    parser.add_argument('--fft-backend', default='auto',
+                        choices=['auto'] + available_backends(),
+                        help="FFT implementation to use")
+    parser.add_argument('--fft-threads', type=int, default=0,
+                        help="FFT worker threads (0 = all cores)")
+    parser.add_argument('--scenario', default=None,
+                        help="Simulate the emitters in a JSON/YAML scenario file")
+    parser.add_argument('--rtl-tcp', default=None, metavar='HOST:PORT',
+                        help="Stream IQ from an rtl_tcp server")
+    parser.add_argument('--sweep', default=None, metavar='START:STOP',
+                        help="Sweep a frequency range in MHz, e.g. 24:1700")
+    parser.add_argument('--sweep-dwell', type=int, default=64*1024,
+                        help="Samples analysed per sweep hop")
+    parser.add_argument('--iq-file', default=None,
+                        help="Replay a cf32/cs16/cu8 or WAV IQ recording")
+    parser.add_argument('--iq-format', default=None, choices=['cf32', 'cs16', 'cu8', 'wav'],
+                        help="IQ file format (default: from the extension)")
+    parser.add_argument('--iq-rate', type=float, default=None,
+                        help="IQ file sample rate (default: WAV header or 2.4 MS/s)")
+    parser.add_argument('--no-loop', action='store_true',
+                        help="Stop at the end of the IQ file instead of looping")
+    parser.add_argument('--fast', action='store_true',
+                        help="Replay the IQ file as fast as possible instead of in real time")
+    parser.add_argument('--history-depth', type=int, default=1000,
+                        help="Waterfall history rows kept (20 rows/s; 72000 = 1 hour)")
+    parser.add_argument('--history-format', default='uint8', choices=HISTORY_FORMATS,
+                        help="Waterfall history storage: uint8 color indices or float16 dB")
+    parser.add_argument('--display-fps', type=float, default=20.0,
+                        help="Display refresh rate; processing runs at its own rate")
+    parser.add_argument('--coalesce', default='latest', choices=COALESCE_MODES,
+                        help="How frames between display refreshes are combined")
+    parser.add_argument('--frame-size', type=int, default=64*1024,
+                        help="IQ samples per processed spectrum frame")
+    parser.add_argument('--trigger-level', type=float, default=None,
+                        help="Enable a level trigger on the band max power (dB)")
+    parser.add_argument('--trigger-holdoff', type=float, default=1.0,
+                        help="Minimum seconds between triggers")
+    parser.add_argument('--iq-trigger-level', type=float, default=None,
+                        help="Enable a sample-resolution IQ magnitude trigger (dBFS)")
+    parser.add_argument('--iq-trigger-hysteresis', type=float, default=3.0,
+                        help="dB the magnitude must drop below the level to end a pulse")
+    parser.add_argument('--iq-trigger-edge', default='rising', choices=['rising', 'falling'])
+    parser.add_argument('--iq-trigger-min-width', type=float, default=0.0,
+                        help="Shortest pulse in seconds that fires the IQ trigger")
+    parser.add_argument('--capture-dir', default=None,
+                        help="Save raw IQ around each trigger into this directory")
+    parser.add_argument('--capture-pre', type=float, default=0.25,
+                        help="Seconds of IQ saved before a trigger")
+    parser.add_argument('--capture-post', type=float, default=0.5,
+                        help="Seconds of IQ saved after a trigger")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH,
+                        help="Signal database file (default: %(default)s)")
+    parser.add_argument('--retention-days', type=float, default=None,
+                        help="Compact raw measurements older than this into the rollups")
+    return parser.parse_known_args(argv)
 
 def main():
-    app = QApplication(sys.argv)
+    args, qt_args = parse_args(sys.argv[1:])
+    app = QApplication(sys.argv[:1] + qt_args)
     
     # Set style
     app.setStyle('Fusion')
     
     # Initialize components
-    window = SpectrumAnalyzerWindow()
-    sdr = SDRController()
-    processor = SignalProcessor()
+    window = SpectrumAnalyzerWindow(args.db)
+    window.set_history(SpectrumHistory(args.history_depth, format=args.history_format))
+    if args.retention_days is not None:
+        window.db_writer.set_retention(args.retention_days)
+    realtime = True  # Pace acquisition to the sample rate
+    if args.rtl_tcp:
+        host, _, port = args.rtl_tcp.rpartition(':')
+        sdr = RtlTcpSource(host or '127.0.0.1', int(port))
+    elif args.iq_file:
+        sdr = FileSource(args.iq_file, format=args.iq_format, sample_rate=args.iq_rate,
+                         loop=not args.no_loop, realtime=not args.fast)
+        realtime = not args.fast
+    else:
+        scenario = load_scenario(args.scenario) if args.scenario else None
+        sdr = SDRController(scenario=scenario)
+    processor = SignalProcessor(sdr.sample_rate, backend=create_backend(args.fft_backend, args.fft_threads))
+    window.set_fft_backend(processor.backend.describe())
     
     if not sdr.initialize():
         print("Failed to initialize SDR device")
         sys.exit(1)
     
+    # Acquisition runs on its own thread and fills the ring buffer
+    block_size = 256*1024
+    ring = IQRingBuffer(capacity=16 * block_size)
+    acquisition = AcquisitionThread(sdr, ring, block_size=block_size, realtime=realtime)
+    
+    # Every frame is processed (and seen by detection, triggers and
+    # recording); the display only takes the coalesced result
+    coalescer = FrameCoalescer(args.coalesce)
+    processing = ProcessingThread(ring.reader(), processor, coalescer, frame_size=args.frame_size)
+    processing.add_consumer(window.process_frame)
+    
+    if args.trigger_level is not None:
+        window.trigger_system.level = args.trigger_level
+        window.trigger_system.holdoff = args.trigger_holdoff
+        window.trigger_system.enabled = True
+    capture = None
+    if args.capture_dir:
+        capture = IQCapture(ring, sdr, window.signal_db, args.capture_dir,
+                            pre_time=args.capture_pre, post_time=args.capture_post)
+        window.set_iq_capture(capture)
+    
+    iq_trigger = None
+    if args.iq_trigger_level is not None:
+        iq_trigger = IQTrigger(sdr.sample_rate, args.iq_trigger_level, args.iq_trigger_hysteresis,
+                               args.iq_trigger_edge, args.iq_trigger_min_width)
+        
+        def check_iq_trigger(samples, seq, timestamp):
+            indices, _ = iq_trigger.process(samples, seq, timestamp)
+            if capture is not None:
+                for index, timestamp in zip(indices, iq_trigger.timestamps(indices)):
+                    capture.trigger(index, timestamp, reason="IQ level")
+        processing.add_block_consumer(check_iq_trigger)
+    
+    # In sweep mode the sweep thread drives the source instead
+    sweep = None
+    if args.sweep:
+        start, stop = (float(f) * 1e6 for f in args.sweep.split(':'))
+        scheduler = SweepScheduler(sdr, processor, start, stop, dwell_samples=args.sweep_dwell)
+        sweep = SweepThread(scheduler)
+        window.set_sweep_range(start / 1e6, stop / 1e6)
+    
     # Create update timer
     timer = QTimer()
     
+    last_sweep = -1
+    
     def update():
-        samples = sdr.get_samples()
-        freq, power = processor.compute_fft(samples)
+        nonlocal last_sweep
+        if sweep is not None:
+            if sweep.sequence == last_sweep:
+                return
+            last_sweep = sweep.sequence
+            freq, power = sweep.get_latest()
+            if power is None:
+                return
+            processor.traces.update(power)
+            window.process_frame(freq, power, time.time())
+            hold = processor.hold_trace
+            window.update_hold_trace(freq, hold.data if hold.enabled else None)
+            window.update_spectrum(freq, processor.live_trace.data)
+            window.update_sweep_status(sweep.scheduler.get_stats())
+            return
+        
+        frame = coalescer.pull()
+        if frame is None:
+            return
+        freq, power, hold = frame
+        window.update_hold_trace(freq, hold)
         window.update_spectrum(freq, power)
+        window.update_buffer_status(acquisition.get_stats())
+        stats = processing.get_stats()
+        if iq_trigger is not None:
+            stats.update(iq_trigger.get_stats())
+        window.update_frame_status(stats)
     
     # Connect controls
     window.center_freq_spin.valueChanged.connect(
@@ -35,22 +195,46 @@ def main():
         lambda g: sdr.set_gain(g))
     
     # Add these new connections
+    # Trace settings are applied between frames on the processing thread;
+    # in sweep mode the traces are updated here, so apply them directly
+    def apply_trace_setting(func, *args):
+        if sweep is not None:
+            func(*args)
+        else:
+            processing.submit(func, *args)
     window.peak_hold_cb.currentTextChanged.connect(
-        lambda mode: processor.reset_peak_hold() if mode == "No Peak Hold" else None)
+        lambda mode: apply_trace_setting(processor.set_hold_mode, HOLD_MODES.get(mode)))
+    window.averaging_spin.valueChanged.connect(
+        lambda count: apply_trace_setting(processor.set_averaging, count))
     window.color_scheme_cb.currentTextChanged.connect(
         lambda scheme: window.change_color_scheme(scheme))
     
     # Connect timer to update function
     timer.timeout.connect(update)
-    timer.start(50)  # Update every 50ms for smoother display
+    timer.start(int(1000 / args.display_fps))
     
     # Show window and start event loop
     window.show()
+    if sweep is not None:
+        sweep.start()
+    else:
+        acquisition.start()
+        processing.start()
+        if capture is not None:
+            capture.start()
     
     try:
         sys.exit(app.exec())
     finally:
+        if sweep is not None:
+            sweep.stop()
+        processing.stop()
+        if capture is not None:
+            capture.stop()
+        acquisition.stop()
         sdr.close()
+        window.db_writer.close()
+        window.signal_db.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
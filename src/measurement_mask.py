@@ -1,3 +1,4 @@
+import threading
 import numpy as np
 from dataclasses import dataclass
 
@@ -13,44 +14,262 @@ class MeasurementMask:
         self.points = []
         self.enabled = False
         self.violation_callback = None
-        
+        self.version = 0  # Bumped whenever the points change
+        self._axis_key = None
+        self._compiled_version = None
+
     def add_point(self, frequency, upper_limit, lower_limit):
         """Add a point to the mask"""
         self.points.append(MaskPoint(frequency, upper_limit, lower_limit))
         self.points.sort(key=lambda p: p.frequency)
-        
+        self.version += 1
+
+    def clear_points(self):
+        """Remove all points"""
+        self.points.clear()
+        self.version += 1
+
+    def _axis_signature(self, frequencies):
+        # Frequency axes are identified by their length and a few samples
+        # rather than compared element by element every frame
+        n = len(frequencies)
+        if n == 0:
+            return (0,)
+        return (n, frequencies[0], frequencies[n // 2], frequencies[-1])
+
+    def compile(self, frequencies):
+        """Upper and lower limit arrays for a frequency axis.
+
+        Limits are linearly interpolated between points; outside the
+        points there is no limit. The arrays are cached until the axis or
+        the points change.
+        """
+        key = self._axis_signature(frequencies)
+        if key == self._axis_key and self._compiled_version == (self.version, len(self.points)):
+            return self.upper, self.lower
+
+        n = len(frequencies)
+        if len(self.points) < 2:
+            self.upper = np.full(n, np.inf, dtype=np.float32)
+            self.lower = np.full(n, -np.inf, dtype=np.float32)
+        else:
+            freqs = np.array([p.frequency for p in self.points])
+            uppers = np.array([p.upper_limit for p in self.points])
+            lowers = np.array([p.lower_limit for p in self.points])
+            self.upper = np.interp(frequencies, freqs, uppers, left=np.inf, right=np.inf).astype(np.float32)
+            self.lower = np.interp(frequencies, freqs, lowers, left=-np.inf, right=-np.inf).astype(np.float32)
+
+        # Bins the mask actually constrains, and which limits exist there
+        limited = np.flatnonzero(np.isfinite(self.upper) | np.isfinite(self.lower))
+        if len(limited):
+            self.span = slice(limited[0], limited[-1] + 1)
+        else:
+            self.span = slice(0, 0)
+        self.has_upper = bool(np.isfinite(self.upper[self.span]).any())
+        self.has_lower = bool(np.isfinite(self.lower[self.span]).any())
+        width = self.span.stop - self.span.start
+        self.violated = np.empty(width, dtype=bool)
+        self.scratch = np.empty(width, dtype=bool)
+
+        # Segments between mask points, with the tightest limit in each, so
+        # a check can skip every segment whose trace extremes are inside it
+        if width:
+            point_freqs = [p.frequency for p in self.points]
+            starts = np.searchsorted(frequencies[self.span], point_freqs)
+            self.segment_starts = np.unique(np.clip(starts, 0, width - 1))
+            self.segment_stops = np.append(self.segment_starts[1:], width)
+            self.segment_upper = np.minimum.reduceat(self.upper[self.span], self.segment_starts)
+            self.segment_lower = np.maximum.reduceat(self.lower[self.span], self.segment_starts)
+        else:
+            self.segment_starts = np.zeros(0, dtype=np.intp)
+
+        self._axis_key = key
+        self._compiled_version = (self.version, len(self.points))
+        return self.upper, self.lower
+
+    def margins(self, frequencies, powers):
+        """Distance in dB from each bin to the nearest limit (negative when violating)"""
+        upper, lower = self.compile(frequencies)
+        return np.minimum(upper - powers, powers - lower)
+
+    def _violating_bins(self, p, start, stop):
+        """Exact check of bins start..stop of the constrained span"""
+        upper = self.upper[self.span][start:stop]
+        lower = self.lower[self.span][start:stop]
+        violated = self.violated[:stop - start]
+        np.greater(p[start:stop], upper, out=violated)
+        if self.has_lower:
+            np.less(p[start:stop], lower, out=self.scratch[:stop - start])
+            violated |= self.scratch[:stop - start]
+        return np.flatnonzero(violated) + start
+
     def check_violations(self, frequencies, powers):
-        """Check for mask violations"""
+        """Check for mask violations.
+
+        Returns (indices, margins): the violating bins and how far (in dB,
+        negative) each is past its limit.
+        """
         if not self.enabled:
-            return []
-            
-        violations = []
-        for i, (freq, power) in enumerate(zip(frequencies, powers)):
-            # Find applicable mask points
-            upper = self._interpolate_limit(freq, 'upper')
-            lower = self._interpolate_limit(freq, 'lower')
-            
-            if power > upper or power < lower:
-                violations.append((freq, power))
-                
-        if violations and self.violation_callback:
-            self.violation_callback(violations)
-            
-        return violations
-        
-    def _interpolate_limit(self, freq, limit_type):
-        """Interpolate mask limit at given frequency"""
-        if not self.points:
-            return float('inf') if limit_type == 'upper' else float('-inf')
-            
-        # Find surrounding points
-        for i in range(len(self.points)-1):
-            if self.points[i].frequency <= freq <= self.points[i+1].frequency:
-                p1, p2 = self.points[i], self.points[i+1]
-                t = (freq - p1.frequency) / (p2.frequency - p1.frequency)
-                if limit_type == 'upper':
-                    return p1.upper_limit + t * (p2.upper_limit - p1.upper_limit)
-                else:
-                    return p1.lower_limit + t * (p2.lower_limit - p1.lower_limit)
-                    
-        return float('inf') if limit_type == 'upper' else float('-inf') 
\ No newline at end of file
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+        self.compile(frequencies)
+        span = self.span
+        p = powers[span]
+        flagged = np.zeros(len(self.segment_starts), dtype=bool)
+        if len(flagged):
+            if self.has_upper:
+                flagged |= np.maximum.reduceat(p, self.segment_starts) > self.segment_upper
+            if self.has_lower:
+                flagged |= np.minimum.reduceat(p, self.segment_starts) < self.segment_lower
+
+        segments = np.flatnonzero(flagged)
+        if len(segments) > len(flagged) // 2:
+            indices = self._violating_bins(p, 0, len(p)) + span.start
+        else:
+            parts = [self._violating_bins(p, self.segment_starts[i], self.segment_stops[i])
+                     for i in segments]
+            indices = np.concatenate(parts) + span.start if parts else np.empty(0, dtype=np.intp)
+        # Margins are only worked out for the (few) violating bins
+        p = powers[indices]
+        margins = np.minimum(self.upper[indices] - p, p - self.lower[indices])
+
+        if len(indices) and self.violation_callback:
+            self.violation_callback(indices, margins)
+
+        return indices, margins
+
+class MaskSet:
+    """Evaluates several masks against every frame and accumulates statistics.
+
+    The enabled masks are stacked into (masks, bins) limit matrices, so one
+    set of array operations checks all of them. Per mask and bin it keeps
+    the number of violating frames, the worst (lowest) margin seen and the
+    first and last violation times, in float32/uint32 arrays whose size
+    doesn't grow with run time. Per-mask totals are updated as frames come
+    in, so summary() doesn't have to scan the per-bin arrays.
+    """
+    def __init__(self, masks=None):
+        self.masks = list(masks or [])
+        self.start_time = None  # Times are stored as float32 seconds after this
+        self.lock = threading.Lock()  # evaluate() may run on another thread than summary()
+        self._key = None
+        self.reset()
+
+    def add_mask(self, mask):
+        self.masks.append(mask)
+        self._key = None
+
+    def remove_mask(self, mask):
+        self.masks.remove(mask)
+        self._key = None
+
+    def reset(self):
+        """Clear all accumulated statistics"""
+        with self.lock:
+            self.active = []
+            self.frames = 0
+            self.start_time = None
+            self._key = None
+            self._allocate(0)
+
+    def _allocate(self, bins):
+        n = len(self.active)
+        self.violation_count = np.zeros((n, bins), dtype=np.uint32)
+        self.worst_margin = np.full((n, bins), np.inf, dtype=np.float32)
+        self.first_violation = np.full((n, bins), np.nan, dtype=np.float32)
+        self.last_violation = np.full((n, bins), np.nan, dtype=np.float32)
+        self.frames_failed = np.zeros(n, dtype=np.int64)
+        self.total_violations = np.zeros(n, dtype=np.int64)
+        self.mask_worst = np.full(n, np.inf, dtype=np.float32)
+        self.mask_last_failure = np.full(n, np.nan)
+        self.margin = np.empty((n, bins), dtype=np.float32)
+        self.scratch = np.empty((n, bins), dtype=np.float32)
+        self.violated = np.empty((n, bins), dtype=bool)
+
+    def _compile(self, frequencies):
+        """Stack the enabled masks' limits; statistics restart if anything changed"""
+        active = [m for m in self.masks if m.enabled]
+        key = (tuple(id(m) for m in active),
+               tuple((m.version, len(m.points)) for m in active),
+               active[0]._axis_signature(frequencies) if active else None)
+        if key == self._key:
+            return
+        self.active = active
+        self.frames = 0
+        self.start_time = None
+        self._allocate(len(frequencies) if active else 0)
+        self.upper = np.empty((len(active), len(frequencies)), dtype=np.float32)
+        self.lower = np.empty_like(self.upper)
+        for i, mask in enumerate(active):
+            self.upper[i], self.lower[i] = mask.compile(frequencies)
+        self._key = key
+
+    def evaluate(self, frequencies, powers, timestamp):
+        """Check one frame against every enabled mask.
+
+        Returns a boolean array saying which of the enabled masks failed.
+        """
+        with self.lock:
+            return self._evaluate(frequencies, powers, timestamp)
+
+    def _evaluate(self, frequencies, powers, timestamp):
+        self._compile(frequencies)
+        if not self.active:
+            return np.zeros(0, dtype=bool)
+        if self.start_time is None:
+            self.start_time = timestamp
+        t = np.float32(timestamp - self.start_time)
+
+        # margin = min(upper - p, p - lower) for all masks at once
+        m, s, v = self.margin, self.scratch, self.violated
+        np.subtract(self.upper, powers, out=m)
+        np.subtract(powers, self.lower, out=s)
+        np.minimum(m, s, out=m)
+        np.less(m, 0, out=v)
+
+        np.minimum(self.worst_margin, m, out=self.worst_margin)
+        self.violation_count += v
+        self.last_violation[v] = t
+        new = v & np.isnan(self.first_violation)
+        self.first_violation[new] = t
+
+        counts = v.sum(axis=1)
+        failed = counts > 0
+        self.frames += 1
+        self.frames_failed += failed
+        self.total_violations += counts
+        np.minimum(self.mask_worst, m.min(axis=1), out=self.mask_worst)
+        self.mask_last_failure[failed] = timestamp
+        return failed
+
+    def passed(self):
+        """True if no enabled mask has failed since the statistics started"""
+        return not self.frames_failed.any()
+
+    def summary(self):
+        """Pass/fail totals per enabled mask"""
+        with self.lock:
+            return self._summary()
+
+    def _summary(self):
+        return [{
+            'name': mask.name,
+            'passed': bool(self.frames_failed[i] == 0),
+            'frames': self.frames,
+            'frames_failed': int(self.frames_failed[i]),
+            'violations': int(self.total_violations[i]),
+            'worst_margin': float(self.mask_worst[i]),
+            'last_failure': None if np.isnan(self.mask_last_failure[i]) else float(self.mask_last_failure[i]),
+        } for i, mask in enumerate(self.active)]
+
+    def bin_statistics(self, mask):
+        """Per-bin (count, worst margin, first, last) arrays for an enabled mask.
+
+        Times are absolute (NaN where the bin never violated).
+        """
+        with self.lock:
+            i = self.active.index(mask)
+            offset = self.start_time or 0.0
+            return (self.violation_count[i].copy(), self.worst_margin[i].copy(),
+                    self.first_violation[i].astype(np.float64) + offset,
+                    self.last_violation[i].astype(np.float64) + offset)
@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+import numpy as np
+
+class _Chunk:
+    """One chunk file: timestamps, frequency and power columns of capacity rows"""
+    def __init__(self, chunk_id, signal_id, path, capacity, rows=0, t_start=None, t_end=None,
+                 mode='r+'):
+        self.id = chunk_id
+        self.signal_id = signal_id
+        self.path = path
+        self.capacity = capacity
+        self.rows = rows
+        self.t_start = t_start
+        self.t_end = t_end
+        self.synced_rows = rows  # Row count last written to the index
+        self.map = np.memmap(path, dtype=np.uint8, mode=mode, shape=(capacity * 16,))
+        self.times = self.map[:capacity * 8].view(np.int64)
+        self.freq = self.map[capacity * 8:capacity * 12].view(np.float32)
+        self.power = self.map[capacity * 12:].view(np.float32)
+
+    def append(self, times, freq, power):
+        """Copy as many rows as fit; returns how many were taken"""
+        n = min(len(times), self.capacity - self.rows)
+        end = self.rows + n
+        self.times[self.rows:end] = times[:n]
+        self.freq[self.rows:end] = freq[:n]
+        self.power[self.rows:end] = power[:n]
+        if n:
+            lo, hi = int(times[:n].min()), int(times[:n].max())
+            self.t_start = lo if self.t_start is None else min(self.t_start, lo)
+            self.t_end = hi if self.t_end is None else max(self.t_end, hi)
+        self.rows = end
+        return n
+
+    @property
+    def full(self):
+        return self.rows >= self.capacity
+
+class MeasurementStore:
+    """Columnar store for high-rate per-signal measurements.
+
+    Rows are kept outside SQLite in chunk files, each holding up to
+    chunk_rows rows of one signal as three columns: int64 timestamps
+    (nanoseconds since the epoch), float32 frequency and float32 power.
+    Appends are copies into the signal's open chunk through a memory map;
+    a full chunk is closed and a new one started. The SignalDatabase holds
+    one row per chunk with its time range, so reads only open the chunks
+    that overlap the requested window.
+
+    Chunk row counts are written to the database every sync_interval
+    seconds, when a chunk fills, and on flush()/close(); rows appended
+    after the last sync are still read back by this store, but another
+    process opening the database won't see them until then.
+    """
+    def __init__(self, database, directory="measurements", chunk_rows=65536, sync_interval=1.0):
+        self.database = database
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.sync_interval = sync_interval
+        self.lock = threading.RLock()
+        self.open_chunks = {}  # signal_id -> _Chunk being appended to
+        self.last_sync = time.monotonic()
+        self.rows_appended = 0
+        self.chunks_created = 0
+        os.makedirs(directory, exist_ok=True)
+
+        with database.db.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS measurement_chunks (
+                    id INTEGER PRIMARY KEY,
+                    signal_id INTEGER,
+                    path TEXT,
+                    capacity INTEGER,
+                    rows INTEGER,
+                    t_start INTEGER,
+                    t_end INTEGER
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_measurement_chunks_signal_time "
+                         "ON measurement_chunks(signal_id, t_start)")
+
+    @staticmethod
+    def _to_ns(timestamps):
+        """Seconds (float, like time.time()) or int64 nanoseconds as int64 nanoseconds"""
+        timestamps = np.atleast_1d(np.asarray(timestamps))
+        if timestamps.dtype.kind in 'iu':
+            return timestamps.astype(np.int64, copy=False)
+        return np.round(timestamps * 1e9).astype(np.int64)
+
+    def _new_chunk(self, signal_id):
+        with self.database.db.transaction() as conn:
+            cursor = conn.execute("""
+                INSERT INTO measurement_chunks (signal_id, path, capacity, rows)
+                VALUES (?, '', ?, 0)
+            """, (signal_id, self.chunk_rows))
+            chunk_id = cursor.lastrowid
+            path = os.path.join(self.directory, f"chunk_{chunk_id:08d}.bin")
+            conn.execute("UPDATE measurement_chunks SET path = ? WHERE id = ?", (path, chunk_id))
+        self.chunks_created += 1
+        return _Chunk(chunk_id, signal_id, path, self.chunk_rows, mode='w+')
+
+    def _sync(self, chunks):
+        """Record the row counts and time ranges of chunks in the index"""
+        changed = [c for c in chunks if c.rows != c.synced_rows]
+        if not changed:
+            return
+        with self.database.db.transaction() as conn:
+            conn.executemany(
+                "UPDATE measurement_chunks SET rows = ?, t_start = ?, t_end = ? WHERE id = ?",
+                [(c.rows, c.t_start, c.t_end, c.id) for c in changed])
+        for c in changed:
+            c.synced_rows = c.rows
+
+    def append(self, signal_id, timestamps, frequency, power):
+        """Append rows for one signal.
+
+        timestamps are seconds like time.time() or int64 nanoseconds;
+        frequency and power are scalars or arrays matching timestamps.
+        """
+        times = self._to_ns(timestamps)
+        n = len(times)
+        freq = np.broadcast_to(np.asarray(frequency, dtype=np.float32), (n,))
+        power = np.broadcast_to(np.asarray(power, dtype=np.float32), (n,))
+        with self.lock:
+            self._append(int(signal_id), times, freq, power)
+            self.rows_appended += n
+            self._maybe_sync()
+
+    def append_frame(self, signal_ids, timestamp, frequency, power):
+        """Append one row for each of several signals, all taken at timestamp"""
+        signal_ids = np.asarray(signal_ids).tolist()
+        n = len(signal_ids)
+        t = int(self._to_ns(timestamp)[0])
+        freq = np.broadcast_to(np.asarray(frequency, dtype=np.float32), (n,)).tolist()
+        power = np.broadcast_to(np.asarray(power, dtype=np.float32), (n,)).tolist()
+        with self.lock:
+            for signal_id, f, p in zip(signal_ids, freq, power):
+                chunk = self.open_chunks.get(signal_id)
+                if chunk is None or chunk.rows >= chunk.capacity - 1:
+                    # New or nearly full chunk: take the general path
+                    self._append(signal_id, np.array([t]), np.array([f], dtype=np.float32),
+                                 np.array([p], dtype=np.float32))
+                    continue
+                # Single rows go straight into the maps
+                i = chunk.rows
+                chunk.times[i] = t
+                chunk.freq[i] = f
+                chunk.power[i] = p
+                chunk.rows = i + 1
+                chunk.t_start = min(chunk.t_start, t)
+                chunk.t_end = max(chunk.t_end, t)
+            self.rows_appended += n
+            self._maybe_sync()
+
+    def _append(self, signal_id, times, freq, power):
+        taken = 0
+        while taken < len(times):
+            chunk = self.open_chunks.get(signal_id)
+            if chunk is None:
+                chunk = self.open_chunks[signal_id] = self._new_chunk(signal_id)
+            taken += chunk.append(times[taken:], freq[taken:], power[taken:])
+            if chunk.full:
+                chunk.map.flush()
+                self._sync([chunk])
+                del self.open_chunks[signal_id]
+
+    def _maybe_sync(self):
+        now = time.monotonic()
+        if now - self.last_sync >= self.sync_interval:
+            self._sync(list(self.open_chunks.values()))
+            self.last_sync = now
+
+    def read(self, signal_id, start=None, end=None):
+        """Rows of a signal with start <= timestamp <= end, in append order.
+
+        start and end are seconds like time.time() (None for open ends).
+        Returns (timestamps, frequency, power) arrays: int64 nanoseconds,
+        float32 Hz and float32 dB.
+        """
+        lo = None if start is None else int(self._to_ns(start)[0])
+        hi = None if end is None else int(self._to_ns(end)[0])
+        query = ("SELECT id, path, capacity, rows, t_start, t_end FROM measurement_chunks "
+                 "WHERE signal_id = ?")
+        params = [int(signal_id)]
+        if hi is not None:
+            query += " AND t_start <= ?"
+            params.append(hi)
+        if lo is not None:
+            query += " AND t_end >= ?"
+            params.append(lo)
+        query += " ORDER BY id"
+        rows = self.database.db.reader().execute(query, params).fetchall()
+
+        parts = []
+        with self.lock:
+            open_chunk = self.open_chunks.get(int(signal_id))
+            if open_chunk is not None and open_chunk.rows and all(r[0] != open_chunk.id for r in rows):
+                # Rows appended since the last sync aren't in the index yet
+                if ((hi is None or open_chunk.t_start <= hi)
+                        and (lo is None or open_chunk.t_end >= lo)):
+                    rows.append((open_chunk.id, None, None, None, None, None))
+            for chunk_id, path, capacity, count, _, _ in rows:
+                if open_chunk is not None and chunk_id == open_chunk.id:
+                    chunk, count = open_chunk, open_chunk.rows
+                else:
+                    chunk = _Chunk(chunk_id, signal_id, path, capacity, count, mode='r')
+                times = chunk.times[:count]
+                keep = np.ones(count, dtype=bool)
+                if lo is not None:
+                    keep &= times >= lo
+                if hi is not None:
+                    keep &= times <= hi
+                # Fancy indexing copies, so nothing refers to the map afterwards
+                parts.append((times[keep], chunk.freq[:count][keep], chunk.power[:count][keep]))
+
+        if not parts:
+            return (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32),
+                    np.zeros(0, dtype=np.float32))
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+    def flush(self):
+        """Write open chunks to disk and record their row counts"""
+        with self.lock:
+            for chunk in self.open_chunks.values():
+                chunk.map.flush()
+            self._sync(list(self.open_chunks.values()))
+            self.last_sync = time.monotonic()
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.open_chunks = {}
+
+    def get_stats(self):
+        return {
+            'rows_appended': self.rows_appended,
+            'chunks_created': self.chunks_created,
+            'open_chunks': len(self.open_chunks),
+        }
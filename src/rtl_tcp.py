@@ -0,0 +1,270 @@
+import argparse
+import socket
+import struct
+import threading
+import time
+import numpy as np
+from src.file_source import CU8_LUT
+
+# rtl_tcp command codes (1 byte command + 4 byte big-endian parameter)
+CMD_SET_FREQ = 0x01
+CMD_SET_SAMPLE_RATE = 0x02
+CMD_SET_GAIN_MODE = 0x03
+CMD_SET_GAIN = 0x04
+CMD_SET_FREQ_CORRECTION = 0x05
+CMD_SET_AGC_MODE = 0x08
+
+# Dongle info header: magic, tuner type, number of gain steps
+DONGLE_MAGIC = b'RTL0'
+TUNER_R820T = 5
+R820T_GAINS = [0, 9, 14, 27, 37, 77, 87, 125, 144, 157, 166, 197, 207, 229, 254,
+               280, 297, 328, 338, 364, 372, 386, 402, 421, 434, 439, 445, 480, 496]
+
+class RtlTcpSource:
+    """SDRController-compatible client for an rtl_tcp server"""
+    def __init__(self, host='127.0.0.1', port=1234, sample_rate=2.4e6, center_freq=100e6,
+                 recv_buffer=4 * 1024 * 1024, retune_flush_samples=128 * 1024):
+        self.host = host
+        self.port = port
+        self.sample_rate = sample_rate
+        self.center_freq = center_freq
+        self.gain = 'auto'
+        self.recv_buffer = recv_buffer
+        self.paced = True  # Blocks at the server's sample rate
+        # Samples still in the server and dongle after a retune (one rtl_tcp
+        # USB transfer), for callers to discard; what already reached the
+        # socket buffer is dropped by the next read
+        self.retune_flush_samples = retune_flush_samples
+        self.retuned = False
+        self.sock = None
+        self.tuner_type = None
+        self.gain_count = 0
+        self.raw = np.empty(0, dtype=np.uint8)
+        self.bytes_received = 0
+
+    def initialize(self):
+        """Connect and read the dongle info header"""
+        try:
+            self.sock = socket.create_connection((self.host, self.port), timeout=5)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.recv_buffer)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            header = self._recv_exact(bytearray(12))
+            magic, self.tuner_type, self.gain_count = struct.unpack('>4sII', header)
+            if magic != DONGLE_MAGIC:
+                raise ConnectionError(f"Unexpected rtl_tcp header {magic!r}")
+            self.sock.settimeout(None)
+            self.set_sample_rate(self.sample_rate)
+            self.set_center_freq(self.center_freq)
+            return True
+        except OSError as e:
+            print(f"Error connecting to rtl_tcp server: {e}")
+            return False
+
+    def _recv_exact(self, buffer):
+        """Fill buffer completely with recv_into"""
+        view = memoryview(buffer)
+        received = 0
+        while received < len(view):
+            n = self.sock.recv_into(view[received:])
+            if n == 0:
+                raise ConnectionError("rtl_tcp connection closed")
+            received += n
+        self.bytes_received += received
+        return buffer
+
+    def _send_command(self, command, param):
+        if self.sock is not None:
+            self.sock.sendall(struct.pack('>BI', command, int(param) & 0xFFFFFFFF))
+
+    def _drain(self):
+        """Discard everything already received, keeping I/Q byte pairs aligned"""
+        drained = 0
+        self.sock.setblocking(False)
+        try:
+            while True:
+                n = self.sock.recv_into(self.raw)
+                if n == 0:
+                    break
+                drained += n
+        except BlockingIOError:
+            pass
+        finally:
+            self.sock.setblocking(True)
+        self.bytes_received += drained
+        if drained % 2:
+            self._recv_exact(bytearray(1))
+
+    def read_samples(self, out):
+        """Fill out (complex64) with the next samples from the stream"""
+        n = len(out)
+        if len(self.raw) != 2 * n:
+            self.raw = np.empty(2 * n, dtype=np.uint8)
+        try:
+            if self.retuned:
+                # Drained on the reading thread, so it never races a read
+                self.retuned = False
+                self._drain()
+            self._recv_exact(self.raw)
+        except (OSError, ConnectionError) as e:
+            print(f"Error receiving samples: {e}")
+            return None
+        np.take(CU8_LUT, self.raw, out=out.view(np.float32))
+        return out
+
+    def get_samples(self, num_samples=256*1024):
+        return self.read_samples(np.empty(num_samples, dtype=np.complex64))
+
+    def set_center_freq(self, freq):
+        self.center_freq = freq
+        self._send_command(CMD_SET_FREQ, freq)
+        self.retuned = True
+
+    def set_sample_rate(self, rate):
+        self.sample_rate = rate
+        self._send_command(CMD_SET_SAMPLE_RATE, rate)
+
+    def set_gain(self, gain):
+        """Set gain in dB, or 'auto'"""
+        self.gain = gain
+        if gain == 'auto':
+            self._send_command(CMD_SET_GAIN_MODE, 0)
+        else:
+            self._send_command(CMD_SET_GAIN_MODE, 1)
+            self._send_command(CMD_SET_GAIN, round(float(gain) * 10))
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+class RtlTcpServer:
+    """Minimal rtl_tcp server streaming from any SDRController-like source.
+
+    Lets the network path be tested without hardware, e.g. by serving a
+    FileSource or the simulator.
+    """
+    def __init__(self, source, host='127.0.0.1', port=1234, block_size=64*1024, realtime=True):
+        self.source = source
+        self.host = host
+        self.port = port
+        self.block_size = block_size
+        self.realtime = realtime and not getattr(source, 'paced', False)
+        self.running = threading.Event()
+        self.server_sock = None
+        self.thread = None
+        self.commands = []  # (command, param) received, most recent last
+
+    def start(self):
+        """Start listening in a background thread"""
+        self.server_sock = socket.create_server((self.host, self.port))
+        self.port = self.server_sock.getsockname()[1]
+        self.running.set()
+        self.thread = threading.Thread(target=self._serve, name="rtl_tcp_server", daemon=True)
+        self.thread.start()
+        return self.port
+
+    def stop(self):
+        self.running.clear()
+        if self.server_sock is not None:
+            self.server_sock.close()
+        if self.thread is not None:
+            self.thread.join(1.0)
+
+    def _serve(self):
+        while self.running.is_set():
+            try:
+                client, _ = self.server_sock.accept()
+            except OSError:
+                break
+            with client:
+                self._stream(client)
+
+    def _stream(self, client):
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * 1024 * 1024)
+        client.sendall(struct.pack('>4sII', DONGLE_MAGIC, TUNER_R820T, len(R820T_GAINS)))
+        commands = threading.Thread(target=self._read_commands, args=(client,), daemon=True)
+        commands.start()
+
+        block = np.empty(self.block_size, dtype=np.complex64)
+        scaled = np.empty(2 * self.block_size, dtype=np.float32)
+        raw = np.empty(2 * self.block_size, dtype=np.uint8)
+        start = time.monotonic()
+        sent = 0
+        while self.running.is_set():
+            samples = self.source.read_samples(block)
+            if samples is None:
+                break
+            n = 2 * len(samples)
+            values = samples.view(np.float32)
+            np.multiply(values, 128.0, out=scaled[:n])
+            scaled[:n] += 127.5
+            np.clip(scaled[:n], 0, 255, out=scaled[:n])
+            np.rint(scaled[:n], out=scaled[:n])
+            np.copyto(raw[:n], scaled[:n], casting='unsafe')
+            try:
+                client.sendall(memoryview(raw[:n]))
+            except OSError:
+                break
+
+            sent += len(samples)
+            if self.realtime:
+                delay = start + sent / self.source.sample_rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def _read_commands(self, client):
+        buffer = bytearray(5)
+        view = memoryview(buffer)
+        while self.running.is_set():
+            received = 0
+            try:
+                while received < 5:
+                    n = client.recv_into(view[received:])
+                    if n == 0:
+                        return
+                    received += n
+            except OSError:
+                return
+            command, param = struct.unpack('>BI', buffer)
+            self.commands.append((command, param))
+            self._apply_command(command, param)
+
+    def _apply_command(self, command, param):
+        if command == CMD_SET_FREQ:
+            self.source.set_center_freq(param)
+        elif command == CMD_SET_SAMPLE_RATE:
+            self.source.set_sample_rate(param)
+        elif command == CMD_SET_GAIN_MODE and param == 0:
+            self.source.set_gain('auto')
+        elif command == CMD_SET_GAIN:
+            self.source.set_gain(param / 10)
+
+def main():
+    """Serve an IQ file or the simulator over the rtl_tcp protocol"""
+    from src.file_source import FileSource
+    from src.sdr_controller import SDRController
+
+    parser = argparse.ArgumentParser(description="Local rtl_tcp stand-in server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1234)
+    parser.add_argument('--file', default=None, help="IQ file to serve (default: simulator)")
+    parser.add_argument('--format', default=None)
+    parser.add_argument('--rate', type=float, default=None)
+    args = parser.parse_args()
+
+    if args.file:
+        source = FileSource(args.file, format=args.format, sample_rate=args.rate)
+    else:
+        source = SDRController()
+    server = RtlTcpServer(source, args.host, args.port)
+    print(f"Serving rtl_tcp on {args.host}:{server.start()}")
+    try:
+        while server.thread.is_alive():
+            server.thread.join(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
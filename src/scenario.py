@@ -0,0 +1,300 @@
+import json
+from dataclasses import dataclass, field
+from typing import List, Optional
+import numpy as np
+from scipy.special import jv
+from src.simulator import period_samples, lcm
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+MODULATIONS = ('cw', 'am', 'fm')
+
+# FM sidebands weaker than this (relative amplitude) are not synthesised
+FM_BESSEL_THRESHOLD = 1e-4
+
+# Longest row the generator will use to fit whole modulation periods
+MAX_ROW_SIZE = 16384
+
+@dataclass
+class BurstSchedule:
+    period: float  # seconds between burst starts
+    duration: float  # seconds on per burst
+    offset: float = 0.0
+
+@dataclass
+class HopPattern:
+    frequencies: List[float]  # Hz offsets added to the emitter frequency
+    dwell: float  # seconds per hop
+
+@dataclass
+class Emitter:
+    frequency: float  # Hz relative to the tuned center
+    power_db: float = -30.0  # Carrier power in dBFS
+    modulation: str = 'cw'
+    mod_freq: float = 1000.0
+    depth: float = 0.5  # AM modulation depth
+    deviation: float = 5e3  # FM peak deviation in Hz
+    drift: float = 0.0  # Hz per second
+    bursts: Optional[BurstSchedule] = None
+    hops: Optional[HopPattern] = None
+    name: str = ""
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        if data.get('bursts'):
+            data['bursts'] = BurstSchedule(**data['bursts'])
+        if data.get('hops'):
+            data['hops'] = HopPattern(**data['hops'])
+        emitter = cls(**data)
+        if emitter.modulation not in MODULATIONS:
+            raise ValueError(f"Unknown modulation: {emitter.modulation}")
+        return emitter
+
+@dataclass
+class Scenario:
+    sample_rate: float = 2.4e6
+    noise_floor_db: float = -17.0  # Noise power per sample in dBFS
+    seed: Optional[int] = None
+    emitters: List[Emitter] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data):
+        scenario = cls(
+            sample_rate=data.get('sample_rate', 2.4e6),
+            noise_floor_db=data.get('noise_floor_db', -17.0),
+            seed=data.get('seed'),
+            emitters=[Emitter.from_dict(e) for e in data.get('emitters', [])],
+        )
+        rng = np.random.default_rng(scenario.seed)
+        for spec in data.get('generate', []):
+            scenario.emitters.extend(random_emitters(rng, scenario.sample_rate, **spec))
+        return scenario
+
+def random_emitters(rng, sample_rate, count, freq_range=None, power_range=(-60, -20),
+                    modulations=('cw',), drift_range=(0, 0), burst_fraction=0.0):
+    """Generate count emitters with random frequency, power and modulation"""
+    if freq_range is None:
+        freq_range = (-0.45 * sample_rate, 0.45 * sample_rate)
+    emitters = []
+    for i in range(count):
+        bursts = None
+        if rng.random() < burst_fraction:
+            period = rng.uniform(0.01, 0.5)
+            bursts = BurstSchedule(period, period * rng.uniform(0.1, 0.9), rng.uniform(0, period))
+        emitters.append(Emitter(
+            frequency=rng.uniform(*freq_range),
+            power_db=rng.uniform(*power_range),
+            modulation=str(rng.choice(modulations)),
+            drift=rng.uniform(*drift_range),
+            bursts=bursts,
+            name=f"gen{i}",
+        ))
+    return emitters
+
+def load_scenario(path):
+    """Load a scenario from a JSON or YAML file"""
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise RuntimeError("PyYAML is required for YAML scenarios")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    return Scenario.from_dict(data)
+
+def modulation_waveform(emitter, n, sample_rate):
+    """Baseband modulation of an emitter for samples 0..n, carrier amplitude 1"""
+    t = np.arange(n) / sample_rate
+    tone = np.sin(2 * np.pi * emitter.mod_freq * t)
+    if emitter.modulation == 'am':
+        return 1 + emitter.depth * tone
+    if emitter.modulation == 'fm':
+        return np.exp(1j * (emitter.deviation / emitter.mod_freq) * tone)
+    return np.ones(n)
+
+def modulation_components(emitter):
+    """Express an emitter's modulation as a sum of tones.
+
+    Returns (offsets in Hz, complex amplitudes) relative to the carrier.
+    AM with a sine tone is the carrier plus two sidebands; FM with a sine
+    tone is a Bessel series without its negligible terms.
+    """
+    amplitude = 10 ** (emitter.power_db / 20)
+    fm = emitter.mod_freq
+    if emitter.modulation == 'am':
+        m = emitter.depth
+        offsets = np.array([0.0, fm, -fm])
+        gains = np.array([1.0, m / 2j, -m / 2j])
+    elif emitter.modulation == 'fm':
+        beta = emitter.deviation / fm
+        limit = int(np.ceil(beta)) + 20
+        n = np.arange(-limit, limit + 1)
+        bessel = jv(n, beta)
+        keep = np.abs(bessel) > FM_BESSEL_THRESHOLD
+        offsets = n[keep] * fm
+        gains = bessel[keep].astype(complex)
+    else:
+        offsets = np.array([0.0])
+        gains = np.array([1.0 + 0j])
+    return offsets, amplitude * gains
+
+class ScenarioGenerator:
+    """Renders a scenario in chunks.
+
+    Every emitter is decomposed into tones. Output is built in rows of
+    row_size samples: within a row each tone is a fixed-frequency
+    oscillator (the fine table) and between rows it carries a complex
+    gain holding its phase, burst gate and hop state (the coarse table).
+    The sum over all tones of coarse x fine is a single matrix product,
+    so hundreds of emitters cost one GEMM per chunk rather than one
+    complex exponential per emitter per sample. Drift, hops and bursts
+    are resolved per row.
+
+    The row size is rounded up to a whole number of modulation periods
+    (up to MAX_ROW_SIZE), so an AM or FM emitter's modulation is the same
+    in every row: it is folded into the emitter's fine column and the
+    emitter costs one tone instead of its sidebands. Emitters whose
+    modulation period doesn't fit are decomposed into tones.
+    """
+    def __init__(self, scenario, row_size=1024):
+        self.scenario = scenario
+        self.sample_rate = scenario.sample_rate
+        self.min_row_size = row_size
+        self.rng = np.random.default_rng(scenario.seed)
+        self.position = 0  # Absolute sample index of the next output sample
+        self.pending = np.empty(0, dtype=np.complex64)
+        self._build()
+
+    def set_sample_rate(self, rate):
+        self.sample_rate = rate
+        self._build()
+
+    def _build(self):
+        """Flatten emitters into per-tone arrays"""
+        emitters = self.scenario.emitters
+        # Modulated emitters whose period fits in a row get folded
+        common = 1
+        folded = set()
+        for i, emitter in enumerate(emitters):
+            if emitter.modulation == 'cw':
+                continue
+            period = period_samples([emitter.mod_freq], self.sample_rate)
+            if period is not None and lcm(common, period) <= MAX_ROW_SIZE:
+                common = lcm(common, period)
+                folded.add(i)
+        self.row_size = -(-self.min_row_size // common) * common
+        if self.row_size > MAX_ROW_SIZE:
+            self.row_size = common
+
+        owner, offsets, gains = [], [], []
+        modulations = [np.ones(self.row_size)]
+        mod_index = []  # Row of modulations applied to each tone's fine column
+        for i, emitter in enumerate(emitters):
+            if i in folded:
+                o = np.zeros(1)
+                g = np.array([10 ** (emitter.power_db / 20) + 0j])
+                mod_index.append([len(modulations)])
+                modulations.append(modulation_waveform(emitter, self.row_size, self.sample_rate))
+            else:
+                o, g = modulation_components(emitter)
+                mod_index.append(np.zeros(len(o), dtype=int))
+            owner.append(np.full(len(o), i))
+            offsets.append(o)
+            gains.append(g)
+        self.modulations = np.array(modulations, dtype=np.complex64)
+        self.tone_modulation = np.concatenate(mod_index).astype(int) if mod_index else np.zeros(0, dtype=int)
+        self.modulated = len(folded) > 0
+        self.tone_owner = np.concatenate(owner) if owner else np.zeros(0, dtype=int)
+        self.tone_offset = np.concatenate(offsets) if offsets else np.zeros(0)
+        self.tone_gain = np.concatenate(gains) if gains else np.zeros(0, dtype=complex)
+        self.tone_cycles = np.zeros(len(self.tone_owner))  # Phase state, in cycles
+
+        self.base_freq = np.array([e.frequency for e in emitters], dtype=np.float64)
+        self.drift = np.array([e.drift for e in emitters], dtype=np.float64)
+        self.burst_emitters = [i for i, e in enumerate(emitters) if e.bursts]
+        self.hop_emitters = [i for i, e in enumerate(emitters) if e.hops]
+        self.hop_tones = {i: np.flatnonzero(self.tone_owner == i) for i in self.hop_emitters}
+        self.fixed_tones = np.flatnonzero(~np.isin(self.tone_owner, self.hop_emitters))
+
+        noise_power = 10 ** (self.scenario.noise_floor_db / 10)
+        self.noise_level = np.sqrt(noise_power / 2)
+        self.fine_index = np.arange(self.row_size) / self.sample_rate
+
+    def _render_rows(self, num_rows):
+        """Render num_rows * row_size samples starting at self.position"""
+        B = self.row_size
+        fs = self.sample_rate
+        row_times = (self.position + np.arange(num_rows) * B) / fs
+        num_emitters = len(self.base_freq)
+
+        # Carrier frequency and hop channel of each emitter for each row
+        carrier = self.base_freq[:, None] + self.drift[:, None] * row_times[None, :]
+        hop_index = np.zeros((num_emitters, num_rows), dtype=int)
+        for i in self.hop_emitters:
+            hops = self.scenario.emitters[i].hops
+            hop_index[i] = (row_times // hops.dwell).astype(int) % len(hops.frequencies)
+            carrier[i] += np.asarray(hops.frequencies)[hop_index[i]]
+
+        # Burst gates per row
+        gate = np.ones((num_emitters, num_rows), dtype=np.float32)
+        for i in self.burst_emitters:
+            bursts = self.scenario.emitters[i].bursts
+            phase = np.mod(row_times - bursts.offset, bursts.period)
+            gate[i] = phase < bursts.duration
+
+        # Tone phase at the start of every row, carried between chunks
+        tone_freq = carrier[self.tone_owner] + self.tone_offset[:, None]
+        steps = tone_freq * (B / fs)
+        cycles = np.cumsum(steps, axis=1) - steps + self.tone_cycles[:, None]
+        self.tone_cycles = np.mod(cycles[:, -1] + steps[:, -1], 1.0)
+        cycles -= np.floor(cycles)
+        coarse = (self.tone_gain[:, None] * gate[self.tone_owner]) * np.exp(2j * np.pi * cycles)
+
+        # One fine-table column per fixed tone, and per hop channel used in
+        # this chunk for hopping tones
+        mid = num_rows // 2
+        columns = [coarse[self.fixed_tones]]
+        fine_freq = [tone_freq[self.fixed_tones, mid]]
+        column_tones = [self.fixed_tones]
+        for i in self.hop_emitters:
+            tones = self.hop_tones[i]
+            for channel in np.unique(hop_index[i]):
+                active = hop_index[i] == channel
+                rows = np.flatnonzero(active)
+                columns.append(coarse[tones] * active[None, :])
+                fine_freq.append(tone_freq[tones, rows[len(rows) // 2]])
+                column_tones.append(tones)
+        coarse = np.concatenate(columns).astype(np.complex64)
+        fine_freq = np.concatenate(fine_freq)
+        fine = np.exp(2j * np.pi * fine_freq[:, None] * self.fine_index[None, :]).astype(np.complex64)
+        if self.modulated:
+            fine *= self.modulations[self.tone_modulation[np.concatenate(column_tones)]]
+
+        block = coarse.T @ fine  # (rows, row_size)
+        self.position += num_rows * B
+        return block.ravel()
+
+    def read(self, out):
+        """Fill out (complex64) with the next len(out) samples"""
+        n = len(out)
+        noise = out.view(np.float32)
+        self.rng.standard_normal(out=noise, dtype=np.float32)
+        noise *= self.noise_level
+
+        done = min(n, len(self.pending))
+        out[:done] += self.pending[:done]
+        self.pending = self.pending[done:]
+        if done < n:
+            num_rows = -(-(n - done) // self.row_size)
+            block = self._render_rows(num_rows)
+            out[done:] += block[:n - done]
+            self.pending = block[n - done:]
+        return out
+
+    def generate(self, num_samples):
+        """Generate num_samples into a new array"""
+        return self.read(np.empty(num_samples, dtype=np.complex64))
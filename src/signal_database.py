@@ -1,15 +1,67 @@
-import sqlite3
+import os
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
+from src.db_connection import ConnectionManager
+
+# Per-user database, kept out of the working directory (WAL mode adds -wal/-shm files)
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".sdr_analyzer", "signals.db")
+
+# Columns of the signals table, in table order
+SIGNAL_COLUMNS = ('id', 'name', 'frequency', 'bandwidth', 'power', 'modulation', 'description',
+                  'timestamp')
+
+INSERT_SIGNAL = """
+    INSERT INTO signals 
+    (name, frequency, bandwidth, power, modulation, description, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_MEASUREMENT = """
+    INSERT INTO measurements 
+    (signal_id, frequency, power, timestamp)
+    VALUES (?, ?, ?, ?)
+"""
+
+# Time granularity of the activity R*Tree, seconds
+ACTIVITY_STEP = 3600.0
+
+# Measurement rollup bucket sizes in seconds; 0 is one bucket for all time
+ROLLUP_RESOLUTIONS = {'minute': 60, 'hour': 3600, 'day': 86400, 'total': 0}
+
+# Per-modulation signal aggregates kept in signal_summary
+SUMMARY_COLUMNS = ('count', 'freq_count', 'freq_min', 'freq_max', 'freq_sum',
+                   'power_count', 'power_min', 'power_max', 'power_sum')
+
+# Stored timestamp text as seconds, for the activity index
+def _seconds_sql(expr):
+    return f"((julianday({expr}) - 2440587.5) * 86400.0)"
+
+def timestamp_now():
+    # Same text the sqlite3 datetime adapter stored for datetime.now()
+    return datetime.now().isoformat(" ")
+
+def _timestamp_text(value):
+    """datetime or stored timestamp text as stored timestamp text"""
+    return value.isoformat(" ") if isinstance(value, datetime) else value
+
+def _timestamp_seconds(value):
+    """datetime or timestamp text in the activity index's time units"""
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value)
+    return (value.replace(tzinfo=None) - datetime(1970, 1, 1)).total_seconds()
 
 class SignalDatabase:
-    def __init__(self, db_path="signals.db"):
+    def __init__(self, db_path=DEFAULT_DB_PATH, occupancy_level=-80.0, **connection_options):
         self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.occupancy_level = occupancy_level  # dB a measurement must exceed to count as occupied
+        self.db = ConnectionManager(db_path, **connection_options)
         self.init_database()
         
     def init_database(self):
         """Initialize database tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.db.transaction() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS signals (
                     id INTEGER PRIMARY KEY,
@@ -33,50 +85,341 @@ class SignalDatabase:
                     FOREIGN KEY(signal_id) REFERENCES signals(id)
                 )
             """)
+            
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS captures (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT,
+                    format TEXT,
+                    trigger_time REAL,
+                    center_freq REAL,
+                    sample_rate REAL,
+                    num_samples INTEGER,
+                    pre_samples INTEGER,
+                    reason TEXT,
+                    complete INTEGER,
+                    timestamp DATETIME
+                )
+            """)
+            
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_signals_frequency ON signals(frequency)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_signals_timestamp ON signals(timestamp)")
+            # Sort keys of the signal table view, so its pages are index range scans
+            for column in ('name', 'bandwidth', 'power', 'modulation', 'description'):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_signals_{column} ON signals({column})")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_measurements_signal_time "
+                         "ON measurements(signal_id, timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_measurements_timestamp "
+                         "ON measurements(timestamp)")
+            
+            # Band and time span each signal was seen over, exactly, and as
+            # an R*Tree of boxes padded out to whole ACTIVITY_STEPs so that
+            # most new measurements don't have to move a box
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS activity_spans (
+                    signal_id INTEGER PRIMARY KEY,
+                    freq_lo REAL,
+                    freq_hi REAL,
+                    t_start REAL,
+                    t_end REAL
+                )
+            """)
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS signal_activity
+                USING rtree(id, freq_lo, freq_hi, t_start, t_end)
+            """)
+            if conn.execute("SELECT 1 FROM activity_spans LIMIT 1").fetchone() is None:
+                self._index_signals(conn, 0)
+                self._extend_activity(conn, 0)
+            
+            # Measurement aggregates per signal and time bucket, updated as
+            # rows are written so they outlive compacted raw rows
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS measurement_rollups (
+                    signal_id INTEGER,
+                    resolution INTEGER,
+                    bucket INTEGER,
+                    count INTEGER,
+                    occupied INTEGER,
+                    power_min REAL,
+                    power_max REAL,
+                    power_sum REAL,
+                    PRIMARY KEY (signal_id, resolution, bucket)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_rollups_resolution_bucket "
+                         "ON measurement_rollups(resolution, bucket)")
+            conn.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS rollup_delta (
+                    signal_id INTEGER,
+                    bucket INTEGER,
+                    count INTEGER,
+                    occupied INTEGER,
+                    power_min REAL,
+                    power_max REAL,
+                    power_sum REAL
+                )
+            """)
+            if conn.execute("SELECT 1 FROM measurement_rollups LIMIT 1").fetchone() is None:
+                self._roll_up(conn, 0)
+            
+            # Signal statistics per modulation, so get_statistics doesn't scan
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS signal_summary (
+                    modulation TEXT,
+                    {', '.join(f'{column} REAL' for column in SUMMARY_COLUMNS)}
+                )
+            """)
+            if conn.execute("SELECT 1 FROM signal_summary LIMIT 1").fetchone() is None:
+                self._summarize_signals(conn, 0)
+    
+    def _index_signals(self, conn, after_id):
+        """Add activity spans for signals with id > after_id"""
+        conn.execute(f"""
+            INSERT INTO activity_spans (signal_id, freq_lo, freq_hi, t_start, t_end)
+            SELECT id, lo, hi, t, t FROM (
+                SELECT id,
+                       frequency - abs(coalesce(bandwidth, 0)) / 2 AS lo,
+                       frequency + abs(coalesce(bandwidth, 0)) / 2 AS hi,
+                       {_seconds_sql('timestamp')} AS t
+                FROM signals
+                WHERE id > ? AND frequency IS NOT NULL AND timestamp IS NOT NULL
+            )
+        """, (after_id,))
+        conn.execute(f"""
+            INSERT INTO signal_activity (id, freq_lo, freq_hi, t_start, t_end)
+            SELECT signal_id, freq_lo, freq_hi,
+                   CAST(t_start / {ACTIVITY_STEP} AS INTEGER) * {ACTIVITY_STEP},
+                   CAST(t_end / {ACTIVITY_STEP} AS INTEGER) * {ACTIVITY_STEP} + {ACTIVITY_STEP}
+            FROM activity_spans WHERE signal_id > ?
+        """, (after_id,))
+    
+    def _extend_activity(self, conn, after_id):
+        """Grow activity spans to cover measurements with id > after_id"""
+        spans = conn.execute(f"""
+            SELECT signal_id, min(frequency), max(frequency),
+                   {_seconds_sql('min(timestamp)')}, {_seconds_sql('max(timestamp)')}
+            FROM measurements NOT INDEXED  -- a rowid range, not an index scan for the grouping
+            WHERE id > ? AND frequency IS NOT NULL AND timestamp IS NOT NULL
+            GROUP BY signal_id
+        """, (after_id,)).fetchall()
+        if not spans:
+            return
+        conn.executemany("""
+            UPDATE activity_spans SET
+                freq_lo = min(freq_lo, ?2), freq_hi = max(freq_hi, ?3),
+                t_start = min(t_start, ?4), t_end = max(t_end, ?5)
+            WHERE signal_id = ?1
+        """, spans)
+        # Rewriting an R*Tree entry is slow, so only touch the boxes the
+        # new measurements fall outside of
+        step = ACTIVITY_STEP
+        padded = [(signal_id, lo, hi, t_start // step * step, t_end // step * step + step)
+                  for signal_id, lo, hi, t_start, t_end in spans]
+        conn.executemany("""
+            UPDATE signal_activity SET
+                freq_lo = min(freq_lo, ?2), freq_hi = max(freq_hi, ?3),
+                t_start = min(t_start, ?4), t_end = max(t_end, ?5)
+            WHERE id = ?1 AND (freq_lo > ?2 OR freq_hi < ?3 OR t_start > ?4 OR t_end < ?5)
+        """, padded)
+    
+    def _roll_up(self, conn, after_id):
+        """Add measurements with id > after_id to the rollups"""
+        # Aggregate the new rows per minute once, then merge that into
+        # every resolution
+        minute = ROLLUP_RESOLUTIONS['minute']
+        conn.execute(f"""
+            INSERT INTO rollup_delta
+            SELECT signal_id, CAST({_seconds_sql('timestamp')} / {minute} AS INTEGER) * {minute},
+                   count(*), sum(power > ?), min(power), max(power), sum(power)
+            FROM measurements NOT INDEXED  -- a rowid range, not an index scan for the grouping
+            WHERE id > ? AND timestamp IS NOT NULL AND power IS NOT NULL
+            GROUP BY 1, 2
+        """, (self.occupancy_level, after_id))
+        for resolution in ROLLUP_RESOLUTIONS.values():
+            bucket = f"bucket / {resolution} * {resolution}" if resolution else "0"
+            conn.execute(f"""
+                INSERT INTO measurement_rollups
+                SELECT signal_id, {resolution}, {bucket}, sum(count), sum(occupied),
+                       min(power_min), max(power_max), sum(power_sum)
+                FROM rollup_delta WHERE true
+                GROUP BY 1, 3
+                ON CONFLICT (signal_id, resolution, bucket) DO UPDATE SET
+                    count = count + excluded.count,
+                    occupied = occupied + excluded.occupied,
+                    power_min = min(power_min, excluded.power_min),
+                    power_max = max(power_max, excluded.power_max),
+                    power_sum = power_sum + excluded.power_sum
+            """)
+        conn.execute("DELETE FROM rollup_delta")
+    
+    def _summary_rows(self, conn, where, params):
+        return conn.execute(f"""
+            SELECT modulation, count(*), count(frequency), min(frequency), max(frequency),
+                   sum(frequency), count(power), min(power), max(power), sum(power)
+            FROM signals WHERE {where} GROUP BY modulation
+        """, params).fetchall()
+    
+    def _summarize_signals(self, conn, after_id):
+        """Merge signals with id > after_id into signal_summary"""
+        placeholders = ', '.join('?' * (len(SUMMARY_COLUMNS) + 1))
+        for new in self._summary_rows(conn, "id > ?", (after_id,)):
+            modulation = new[0]
+            old = conn.execute(f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM signal_summary "
+                               "WHERE modulation IS ?", (modulation,)).fetchone()
+            merged = list(new)
+            if old is not None:
+                for i, column in enumerate(SUMMARY_COLUMNS, 1):
+                    a, b = old[i - 1], new[i]
+                    if a is None or b is None:
+                        merged[i] = b if a is None else a
+                    elif column.endswith('_min'):
+                        merged[i] = min(a, b)
+                    elif column.endswith('_max'):
+                        merged[i] = max(a, b)
+                    else:
+                        merged[i] = a + b
+            conn.execute("DELETE FROM signal_summary WHERE modulation IS ?", (modulation,))
+            conn.execute(f"INSERT INTO signal_summary VALUES ({placeholders})", merged)
+    
+    def _resummarize(self, conn, modulation):
+        """Rebuild one modulation's summary row (minimums can't be undone by deletes)"""
+        placeholders = ', '.join('?' * (len(SUMMARY_COLUMNS) + 1))
+        conn.execute("DELETE FROM signal_summary WHERE modulation IS ?", (modulation,))
+        conn.executemany(f"INSERT INTO signal_summary VALUES ({placeholders})",
+                         self._summary_rows(conn, "modulation IS ?", (modulation,)))
+    
+    def _last_id(self, conn, table):
+        return conn.execute(f"SELECT coalesce(max(id), 0) FROM {table}").fetchone()[0]
     
     def add_signal(self, name, frequency, bandwidth, power, modulation="Unknown", description=""):
         """Add a new signal to database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO signals 
-                (name, frequency, bandwidth, power, modulation, description, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (name, frequency, bandwidth, power, modulation, description, datetime.now()))
+        with self.db.transaction() as conn:
+            cursor = conn.execute(INSERT_SIGNAL, (name, frequency, bandwidth, power,
+                                                  modulation, description, timestamp_now()))
+            self._index_signals(conn, cursor.lastrowid - 1)
+            self._summarize_signals(conn, cursor.lastrowid - 1)
             return cursor.lastrowid
             
+    def add_signals_bulk(self, signals):
+        """Add many signals in one transaction.
+
+        signals is an iterable of (name, frequency, bandwidth, power,
+        modulation, description) tuples, optionally with a seventh
+        timestamp; rows without one get the time of the call. Returns the
+        number of rows inserted.
+        """
+        now = timestamp_now()
+        rows = (row if len(row) == 7 else (*row, now) for row in signals)
+        with self.db.transaction() as conn:
+            last_id = self._last_id(conn, 'signals')
+            count = conn.executemany(INSERT_SIGNAL, rows).rowcount
+            self._index_signals(conn, last_id)
+            self._summarize_signals(conn, last_id)
+            return count
+            
     def add_measurement(self, signal_id, frequency, power):
         """Add a measurement for a signal"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT INTO measurements 
-                (signal_id, frequency, power, timestamp)
-                VALUES (?, ?, ?, ?)
-            """, (signal_id, frequency, power, datetime.now()))
+        with self.db.transaction() as conn:
+            cursor = conn.execute(INSERT_MEASUREMENT, (signal_id, frequency, power, timestamp_now()))
+            self._extend_activity(conn, cursor.lastrowid - 1)
+            self._roll_up(conn, cursor.lastrowid - 1)
+            
+    def add_measurements_bulk(self, measurements):
+        """Add many measurements in one transaction.
+
+        measurements is an iterable of (signal_id, frequency, power) tuples,
+        optionally with a fourth timestamp; rows without one get the time of
+        the call. Returns the number of rows inserted.
+        """
+        now = timestamp_now()
+        rows = (row if len(row) == 4 else (*row, now) for row in measurements)
+        with self.db.transaction() as conn:
+            last_id = self._last_id(conn, 'measurements')
+            count = conn.executemany(INSERT_MEASUREMENT, rows).rowcount
+            self._extend_activity(conn, last_id)
+            self._roll_up(conn, last_id)
+            return count
+            
+    def add_capture(self, path, trigger_time, center_freq, sample_rate, num_samples,
+                    pre_samples, format="cf32", reason="", complete=True):
+        """Record an IQ capture written around a trigger"""
+        with self.db.transaction() as conn:
+            cursor = conn.execute("""
+                INSERT INTO captures 
+                (path, format, trigger_time, center_freq, sample_rate, num_samples,
+                 pre_samples, reason, complete, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (path, format, trigger_time, center_freq, sample_rate, num_samples,
+                  pre_samples, reason, int(complete), timestamp_now()))
+            return cursor.lastrowid
+            
+    def get_captures(self):
+        """Get all IQ captures"""
+        conn = self.db.reader()
+        return pd.read_sql_query("SELECT * FROM captures ORDER BY trigger_time", conn)
             
     def get_signals(self):
         """Get all signals"""
-        with sqlite3.connect(self.db_path) as conn:
-            return pd.read_sql_query("SELECT * FROM signals", conn)
-            
-    def get_measurements(self, signal_id):
-        """Get measurements for a signal"""
-        with sqlite3.connect(self.db_path) as conn:
-            return pd.read_sql_query(
-                "SELECT * FROM measurements WHERE signal_id = ?", 
-                conn, 
-                params=(signal_id,)
-            ) 
+        return pd.read_sql_query("SELECT * FROM signals", self.db.reader())
             
-    def search_signals(self, criteria):
-        """Search signals based on criteria"""
-        query = "SELECT * FROM signals WHERE 1=1"
+    def get_measurements(self, signal_id, start=None, end=None):
+        """Get measurements for a signal, optionally between two timestamps"""
+        query = "SELECT * FROM measurements WHERE signal_id = ?"
+        params = [signal_id]
+        if start is not None:
+            query += " AND timestamp >= ?"
+            params.append(_timestamp_text(start))
+        if end is not None:
+            query += " AND timestamp <= ?"
+            params.append(_timestamp_text(end))
+        return pd.read_sql_query(query, self.db.reader(), params=params)
+            
+    def find_active(self, freq_min=None, freq_max=None, start=None, end=None):
+        """Signals active in a band during a time window.
+
+        A signal's activity covers its own band (frequency +- bandwidth/2)
+        and every measurement frequency, from when it was added to its last
+        measurement. Any bound left as None is open.
+        """
+        # The R*Tree's padded boxes pick candidates; the exact spans decide
+        query = """
+            SELECT s.*, e.freq_lo, e.freq_hi
+            FROM signal_activity a
+            JOIN activity_spans e ON e.signal_id = a.id
+            JOIN signals s ON s.id = a.id
+            WHERE 1=1
+        """
+        params = []
+        if freq_max is not None:
+            query += " AND a.freq_lo <= ? AND e.freq_lo <= ?"
+            params += [freq_max, freq_max]
+        if freq_min is not None:
+            query += " AND a.freq_hi >= ? AND e.freq_hi >= ?"
+            params += [freq_min, freq_min]
+        if end is not None:
+            end = _timestamp_seconds(end)
+            query += " AND a.t_start <= ? AND e.t_start <= ?"
+            params += [end, end]
+        if start is not None:
+            start = _timestamp_seconds(start)
+            query += " AND a.t_end >= ? AND e.t_end >= ?"
+            params += [start, start]
+        return pd.read_sql_query(query, self.db.reader(), params=params)
+            
+    def _signal_filter(self, criteria):
+        """WHERE clause and parameters selecting signals that match criteria"""
+        query = "1=1"
         params = []
         
         if 'name' in criteria:
             query += " AND name LIKE ?"
             params.append(f"%{criteria['name']}%")
             
+        if 'text' in criteria:
+            query += " AND (name LIKE ? OR modulation LIKE ? OR description LIKE ?)"
+            params += [f"%{criteria['text']}%"] * 3
+            
         if 'freq_min' in criteria:
             query += " AND frequency >= ?"
             params.append(criteria['freq_min'])
@@ -93,27 +436,174 @@ class SignalDatabase:
             query += " AND modulation = ?"
             params.append(criteria['modulation'])
             
-        with sqlite3.connect(self.db_path) as conn:
-            return pd.read_sql_query(query, conn, params=params)
+        if 'time_min' in criteria:
+            query += " AND timestamp >= ?"
+            params.append(_timestamp_text(criteria['time_min']))
+            
+        if 'time_max' in criteria:
+            query += " AND timestamp <= ?"
+            params.append(_timestamp_text(criteria['time_max']))
+            
+        return query, params
+        
+    def search_signals(self, criteria):
+        """Search signals based on criteria"""
+        where, params = self._signal_filter(criteria)
+        return pd.read_sql_query(f"SELECT * FROM signals WHERE {where}", self.db.reader(),
+                                 params=params)
+            
+    def count_signals(self, criteria=None):
+        """Number of signals matching criteria (all signals if None)"""
+        where, params = self._signal_filter(criteria or {})
+        query = f"SELECT count(*) FROM signals WHERE {where}"
+        return self.db.reader().execute(query, params).fetchone()[0]
+            
+    def get_signals_page(self, criteria=None, order_by='id', descending=False, after=None,
+                         limit=500):
+        """One page of signals as a list of tuples in SIGNAL_COLUMNS order.
+
+        Rows are sorted by order_by, then id. after is the (order_by value,
+        id) of the last row of the previous page, or None for the first
+        page; the page starts right after it, so each page costs the same
+        however deep it is. limit=-1 returns all remaining rows.
+        """
+        if order_by not in SIGNAL_COLUMNS:
+            raise ValueError(f"Unknown column: {order_by}")
+        where, params = self._signal_filter(criteria or {})
+        op, direction = ("<", "DESC") if descending else (">", "ASC")
+        
+        # NULLs sort first ascending and last descending. Rows with and
+        # without a value are queried separately, because an OR across
+        # the two would stop SQLite from using the column's index
+        if after is None:
+            nulls, values = (f"{order_by} IS NULL", []), (f"{order_by} IS NOT NULL", [])
+        elif after[0] is None:
+            nulls = (f"{order_by} IS NULL AND id {op} ?", [after[1]])
+            values = None if descending else (f"{order_by} IS NOT NULL", [])
+        else:
+            nulls = (f"{order_by} IS NULL", []) if descending else None
+            values = (f"({order_by}, id) {op} (?, ?)", list(after))
+        if order_by == 'id':
+            nulls = None
+        segments = [values, nulls] if descending else [nulls, values]
+        
+        rows = []
+        for segment in segments:
+            remaining = limit - len(rows) if limit >= 0 else -1
+            if segment is None or remaining == 0:
+                continue
+            condition, segment_params = segment
+            query = (f"SELECT {', '.join(SIGNAL_COLUMNS)} FROM signals "
+                     f"WHERE {where} AND {condition} "
+                     f"ORDER BY {order_by} {direction}, id {direction} LIMIT ?")
+            rows += self.db.reader().execute(query, params + segment_params + [remaining]).fetchall()
+        return rows
+            
+    def delete_signal(self, signal_id):
+        """Delete a signal with its measurements, activity and rollups"""
+        with self.db.transaction() as conn:
+            row = conn.execute("SELECT modulation FROM signals WHERE id = ?", (signal_id,)).fetchone()
+            conn.execute("DELETE FROM measurements WHERE signal_id = ?", (signal_id,))
+            conn.execute("DELETE FROM measurement_rollups WHERE signal_id = ?", (signal_id,))
+            conn.execute("DELETE FROM signal_activity WHERE id = ?", (signal_id,))
+            conn.execute("DELETE FROM activity_spans WHERE signal_id = ?", (signal_id,))
+            conn.execute("DELETE FROM signals WHERE id = ?", (signal_id,))
+            if row is not None:
+                self._resummarize(conn, row[0])
             
     def get_statistics(self):
-        """Get signal statistics"""
-        with sqlite3.connect(self.db_path) as conn:
-            stats = {}
-            
-            # Frequency distribution
-            stats['freq_dist'] = pd.read_sql_query(
-                "SELECT MIN(frequency) as min_freq, MAX(frequency) as max_freq, "
-                "AVG(frequency) as avg_freq FROM signals", conn)
-                
-            # Power distribution
-            stats['power_dist'] = pd.read_sql_query(
-                "SELECT MIN(power) as min_power, MAX(power) as max_power, "
-                "AVG(power) as avg_power FROM signals", conn)
-                
-            # Modulation types
-            stats['modulations'] = pd.read_sql_query(
-                "SELECT modulation, COUNT(*) as count FROM signals "
-                "GROUP BY modulation", conn)
-                
-            return stats 
\ No newline at end of file
+        """Get signal statistics.
+
+        Read from the per-modulation summary and the all-time measurement
+        rollups, so the cost doesn't grow with the history. 'measurements'
+        covers every measurement ever written, including compacted ones.
+        """
+        conn = self.db.reader()
+        stats = {}
+        
+        # Frequency distribution
+        stats['freq_dist'] = pd.read_sql_query(
+            "SELECT MIN(freq_min) as min_freq, MAX(freq_max) as max_freq, "
+            "SUM(freq_sum) / SUM(freq_count) as avg_freq FROM signal_summary", conn)
+            
+        # Power distribution
+        stats['power_dist'] = pd.read_sql_query(
+            "SELECT MIN(power_min) as min_power, MAX(power_max) as max_power, "
+            "SUM(power_sum) / SUM(power_count) as avg_power FROM signal_summary", conn)
+            
+        # Modulation types
+        stats['modulations'] = pd.read_sql_query(
+            "SELECT modulation, CAST(count AS INTEGER) as count FROM signal_summary "
+            "ORDER BY modulation", conn)
+            
+        # Measured power over all time
+        stats['measurements'] = pd.read_sql_query(
+            "SELECT SUM(count) as count, MIN(power_min) as min_power, "
+            "MAX(power_max) as max_power, SUM(power_sum) / SUM(count) as avg_power, "
+            "1.0 * SUM(occupied) / SUM(count) as occupancy "
+            "FROM measurement_rollups WHERE resolution = 0", conn)
+            
+        return stats
+        
+    def get_trend(self, signal_id=None, resolution='hour', start=None, end=None):
+        """Measured power per time bucket from the rollups.
+
+        resolution is 'minute', 'hour' or 'day'; signal_id None combines
+        all signals. Returns a DataFrame of time (bucket start), count,
+        min_power, max_power, avg_power and occupancy (fraction of
+        measurements above occupancy_level), oldest first.
+        """
+        if resolution not in ROLLUP_RESOLUTIONS or resolution == 'total':
+            raise ValueError(f"Unknown resolution: {resolution}")
+        query = """
+            SELECT bucket, SUM(count) as count, MIN(power_min) as min_power,
+                   MAX(power_max) as max_power, SUM(power_sum) / SUM(count) as avg_power,
+                   1.0 * SUM(occupied) / SUM(count) as occupancy
+            FROM measurement_rollups WHERE resolution = ?
+        """
+        params = [ROLLUP_RESOLUTIONS[resolution]]
+        if signal_id is not None:
+            query += " AND signal_id = ?"
+            params.append(signal_id)
+        if start is not None:
+            query += " AND bucket >= ?"
+            params.append(_timestamp_seconds(start) // params[0] * params[0])
+        if end is not None:
+            query += " AND bucket <= ?"
+            params.append(_timestamp_seconds(end))
+        query += " GROUP BY bucket ORDER BY bucket"
+        trend = pd.read_sql_query(query, self.db.reader(), params=params)
+        trend.insert(0, 'time', pd.to_datetime(trend.pop('bucket'), unit='s'))
+        return trend
+        
+    def compact(self, days, minute_days=None, batch=50000):
+        """Delete raw measurements older than days.
+
+        Their values are already in the rollups, which are kept. Minute
+        rollups older than minute_days are dropped too if given. Rows are
+        deleted in batches of separate transactions so other writers
+        aren't held up. Returns the number of measurements deleted.
+        """
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat(" ")
+        deleted = 0
+        while True:
+            with self.db.transaction() as conn:
+                count = conn.execute("""
+                    DELETE FROM measurements WHERE id IN (
+                        SELECT id FROM measurements WHERE timestamp < ? LIMIT ?
+                    )
+                """, (cutoff, batch)).rowcount
+            deleted += count
+            if count < batch:
+                break
+        if minute_days is not None:
+            minute = ROLLUP_RESOLUTIONS['minute']
+            cutoff = _timestamp_seconds(datetime.now() - timedelta(days=minute_days))
+            with self.db.transaction() as conn:
+                conn.execute("DELETE FROM measurement_rollups WHERE resolution = ? AND bucket < ?",
+                             (minute, cutoff))
+        return deleted
+
+    def close(self):
+        """Close the database connections"""
+        self.db.close()
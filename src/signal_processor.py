@@ -1,49 +1,233 @@
+from collections import OrderedDict
 import numpy as np
 from scipy.signal import windows, find_peaks
 from scipy import signal
+from src.fft_backend import create_backend
+from src.trace_engine import TraceEngine, TraceMode
+
+class FFTPlan:
+    """Per-configuration data that doesn't change between frames"""
+    def __init__(self, fft_size, window_type, sample_rate, dtype, backend):
+        self.fft_size = fft_size
+        self.window_type = window_type
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)
+        
+        real_dtype = np.finfo(self.dtype).dtype
+        window = get_window_array(window_type, fft_size)
+        self.window = window.astype(real_dtype)
+        
+        # Window correction factors
+        self.coherent_gain = np.sum(window) / fft_size
+        self.enbw = fft_size * np.sum(window**2) / np.sum(window)**2  # in bins
+        self.power_scale = 1.0 / np.sum(window)**2
+        
+        self.freq = np.fft.fftshift(np.fft.fftfreq(fft_size, 1/sample_rate))
+        self.backend = backend
+        self.fft = None
+        
+        # Work buffers, sized on first use for a given segment count
+        self.num_segments = 0
+        self.windowed = None
+        self.power = np.empty(fft_size, dtype=real_dtype)
+        self.power_parts = np.empty((fft_size, 2), dtype=real_dtype)
+        self.power_db = np.empty(fft_size, dtype=real_dtype)
+        
+    def get_work_buffer(self, num_segments):
+        """Get the (num_segments, fft_size) buffer for windowed segments"""
+        if num_segments != self.num_segments:
+            shape = (num_segments, self.fft_size)
+            self.windowed = np.empty(shape, dtype=self.dtype)
+            self.fft = self.backend.plan(shape, self.dtype)
+            self.num_segments = num_segments
+        return self.windowed
+
+class FFTPlanCache:
+    """LRU cache of FFTPlans keyed by (fft size, window, sample rate, dtype)"""
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+    def get(self, fft_size, window_type, sample_rate, dtype, backend):
+        key = (int(fft_size), window_type, float(sample_rate), np.dtype(dtype).str)
+        plan = self.plans.get(key)
+        if plan is not None and plan.backend is backend:
+            self.plans.move_to_end(key)
+            self.hits += 1
+            return plan
+            
+        self.misses += 1
+        plan = FFTPlan(fft_size, window_type, sample_rate, dtype, backend)
+        self.plans[key] = plan
+        self.plans.move_to_end(key)
+        while len(self.plans) > self.max_entries:
+            self.plans.popitem(last=False)
+        return plan
+        
+    def clear(self):
+        self.plans.clear()
+
+def get_window_array(window_type, size):
+    """Build a window by name"""
+    if window_type == 'rectangular':
+        return np.ones(size)
+    return getattr(windows, window_type)(size)
 
 class SignalProcessor:
-    def __init__(self, sample_rate=2.4e6):
+    def __init__(self, sample_rate=2.4e6, backend=None):
         self.sample_rate = sample_rate
-        self.peak_hold = None
-        self.max_hold = None
+        
+        # Live (optionally averaged) trace plus a hold trace, all driven
+        # by the same FFT result
+        self.traces = TraceEngine()
+        self.live_trace = self.traces.add_trace(TraceMode.CLEAR_WRITE)
+        self.hold_trace = self.traces.add_trace(TraceMode.MAX_HOLD)
+        self.hold_trace.enabled = False
+        
+        # Welch averaging settings
+        self.welch_enabled = True
+        self.segment_size = 1024
+        self.overlap = 0.5
+        self.window_type = 'blackman'
+        
+        self.backend = backend or create_backend()
+        self.plan_cache = FFTPlanCache()
+
+    def set_backend(self, backend):
+        """Switch FFT backend; cached plans are rebuilt on next use"""
+        self.backend = backend
+        self.plan_cache.clear()
+
+    def get_plan(self, fft_size, dtype=np.complex128):
+        """Get the cached plan for the current settings"""
+        if np.dtype(dtype).kind != 'c':
+            dtype = np.complex128
+        return self.plan_cache.get(fft_size, self.window_type, self.sample_rate,
+                                   dtype, self.backend)
+
+    def set_averaging(self, count):
+        """Average the live trace over count frames (1 disables averaging)"""
+        self.live_trace.set_count(count)
+        self.live_trace.set_mode(TraceMode.AVERAGE if count > 1 else TraceMode.CLEAR_WRITE)
+
+    def set_hold_mode(self, mode):
+        """Set the hold trace mode, or disable it with None"""
+        self.hold_trace.enabled = mode is not None
+        if mode is not None:
+            self.hold_trace.set_mode(mode)
+        self.hold_trace.reset()
+
+    def set_window(self, window_type):
+        """Set the window function (blackman, hann, hamming, flattop, rectangular)"""
+        self.window_type = window_type
+
+    def set_segment_size(self, segment_size):
+        """Set the Welch segment (FFT) size"""
+        self.segment_size = int(segment_size)
+
+    def set_overlap(self, overlap):
+        """Set the fractional overlap between Welch segments"""
+        self.overlap = min(max(float(overlap), 0.0), 0.95)
+
+    def set_rbw(self, rbw):
+        """Choose the segment size that gives approximately the requested RBW"""
+        enbw = self.get_plan(self.segment_size).enbw
+        bins = enbw * self.sample_rate / rbw
+        self.segment_size = int(2 ** max(4, round(np.log2(bins))))
+        return self.get_rbw()
+
+    def get_rbw(self):
+        """Get the resolution bandwidth of the current segment size"""
+        return self.get_plan(self.segment_size).enbw * self.sample_rate / self.segment_size
+
+    def compute_psd(self, samples, segment_size=None, overlap=None, update_traces=True):
+        """Welch averaged power spectrum over the whole sample block.
+
+        The block is split into overlapping windowed segments which are
+        transformed in one batched FFT and averaged in linear power.
+        Levels are corrected for the window's coherent gain so a tone of
+        amplitude A reads 20*log10(A) dB.
+        
+        The returned arrays belong to the cached plan and are overwritten
+        by the next call with the same configuration. Pass
+        update_traces=False for partial spectra (e.g. sweep hops) that
+        shouldn't feed the hold and averaging traces.
+        """
+        if samples is None:
+            return None, None
+        
+        segment_size = segment_size or self.segment_size
+        overlap = self.overlap if overlap is None else overlap
+        
+        if len(samples) < segment_size:
+            samples = np.pad(samples, (0, segment_size - len(samples)))
+        
+        plan = self.get_plan(segment_size, samples.dtype)
+        
+        # Overlapping segments as a strided view, no copy
+        step = max(1, int(segment_size * (1 - overlap)))
+        segments = np.lib.stride_tricks.sliding_window_view(samples, segment_size)[::step]
+        
+        windowed = plan.get_work_buffer(len(segments))
+        np.multiply(segments, plan.window, out=windowed)
+        spectra = plan.fft(windowed)
+        
+        # Average in linear power, squaring the FFT output in place
+        parts = spectra.view(plan.power.dtype).reshape(len(spectra), segment_size, 2)
+        np.square(parts, out=parts)
+        np.sum(parts, axis=0, out=plan.power_parts)
+        power = np.sum(plan.power_parts, axis=1, out=plan.power)
+        power *= plan.power_scale / len(spectra)
+        
+        # fftshift into the dB buffer, then convert in place
+        half = segment_size // 2
+        power_db = plan.power_db
+        power_db[:segment_size - half] = power[half:]
+        power_db[segment_size - half:] = power[:half]
+        np.maximum(power_db, 1e-20, out=power_db)
+        np.log10(power_db, out=power_db)
+        power_db *= 10
+        
+        if update_traces:
+            self._update_holds(power_db)
+        return plan.freq, power_db
 
     def compute_fft(self, samples, num_bins=1024):
         """Compute the FFT of the samples"""
         if samples is None:
             return None, None
         
+        if self.welch_enabled:
+            return self.compute_psd(samples)
+        
         # Apply window function
-        window = windows.blackman(len(samples))
+        window = self.get_plan(len(samples), samples.dtype).window
         windowed_samples = samples * window
         
         # Compute FFT
-        fft = np.fft.fft(windowed_samples, num_bins)
+        windowed_samples = windowed_samples[:num_bins]
+        if len(windowed_samples) < num_bins:
+            windowed_samples = np.pad(windowed_samples, (0, num_bins - len(windowed_samples)))
+        fft = self.backend.fft(windowed_samples)
         fft = np.fft.fftshift(fft)
         
         # Compute frequency axis
-        freq = np.fft.fftshift(np.fft.fftfreq(num_bins, 1/self.sample_rate))
+        freq = self.get_plan(num_bins, samples.dtype).freq
         
         # Convert to dB
         power_db = 20 * np.log10(np.abs(fft))
         
-        # Apply peak hold if enabled
-        if self.peak_hold is None:
-            self.peak_hold = power_db
-        else:
-            self.peak_hold = np.maximum(self.peak_hold * 0.99, power_db)
-            
-        # Apply max hold if enabled
-        if self.max_hold is None:
-            self.max_hold = power_db
-        else:
-            self.max_hold = np.maximum(self.max_hold, power_db)
-        
+        self._update_holds(power_db)
         return freq, power_db
+
+    def _update_holds(self, power_db):
+        """Update the hold and averaging traces"""
+        self.traces.update(power_db)
         
     def reset_peak_hold(self):
-        self.peak_hold = None
-        self.max_hold = None
+        self.traces.reset()
 
     def track_peaks(self, freq, power, threshold=-60, min_distance=10):
         """Track peaks over time"""
@@ -0,0 +1,178 @@
+from fractions import Fraction
+from math import gcd
+import numpy as np
+
+# Longest waveform period (in samples) that is cached as a lookup table
+MAX_TABLE_SIZE = 1 << 21
+
+def lcm(a, b):
+    """Least common multiple (math.lcm needs Python 3.9)"""
+    return a * b // gcd(a, b)
+
+def period_samples(frequencies, sample_rate, max_denominator=10000):
+    """Smallest number of samples after which all frequencies repeat exactly.
+
+    Returns None if the combined period would be longer than MAX_TABLE_SIZE.
+    """
+    period = 1
+    fs = Fraction(sample_rate).limit_denominator(max_denominator)
+    for freq in frequencies:
+        cycles_per_sample = Fraction(freq).limit_denominator(max_denominator) / fs
+        period = lcm(period, cycles_per_sample.denominator)
+        if period > MAX_TABLE_SIZE:
+            return None
+    return period
+
+def oscillator(freq, n, sample_rate, start=0):
+    """exp(j*2*pi*freq*t) for samples start..start+n, with the phase reduced
+    to one cycle before it is scaled so precision doesn't depend on start"""
+    cycles = np.arange(start, start + n, dtype=np.float64) * (freq / sample_rate)
+    cycles -= np.floor(cycles)
+    return np.exp(2j * np.pi * cycles)
+
+class Tone:
+    def __init__(self, freq, amplitude):
+        self.freq = freq
+        self.amplitude = amplitude
+
+    def frequencies(self):
+        return [self.freq]
+
+    def render(self, n, sample_rate, start=0):
+        return self.amplitude * oscillator(self.freq, n, sample_rate, start)
+
+class AMSignal(Tone):
+    def __init__(self, freq, amplitude, mod_freq=1000, depth=0.5):
+        super().__init__(freq, amplitude)
+        self.mod_freq = mod_freq
+        self.depth = depth
+
+    def frequencies(self):
+        return [self.freq, self.mod_freq]
+
+    def render(self, n, sample_rate, start=0):
+        envelope = 1 + self.depth * oscillator(self.mod_freq, n, sample_rate, start).imag
+        return self.amplitude * envelope * oscillator(self.freq, n, sample_rate, start)
+
+class FMSignal(Tone):
+    def __init__(self, freq, amplitude, mod_freq=1000, deviation=50e3):
+        super().__init__(freq, amplitude)
+        self.mod_freq = mod_freq
+        self.deviation = deviation
+
+    def frequencies(self):
+        return [self.freq, self.mod_freq]
+
+    def render(self, n, sample_rate, start=0):
+        beta = self.deviation / self.mod_freq
+        modulation = np.exp(1j * beta * oscillator(self.mod_freq, n, sample_rate, start).imag)
+        return self.amplitude * modulation * oscillator(self.freq, n, sample_rate, start)
+
+class PulsedSignal(Tone):
+    def __init__(self, freq, amplitude, pulse_rate=10, duty=0.5):
+        super().__init__(freq, amplitude)
+        self.pulse_rate = pulse_rate
+        self.duty = duty
+
+    def frequencies(self):
+        return [self.freq, self.pulse_rate]
+
+    def render(self, n, sample_rate, start=0):
+        cycles = np.arange(start, start + n, dtype=np.float64) * (self.pulse_rate / sample_rate)
+        gate = (cycles - np.floor(cycles)) < self.duty
+        return self.amplitude * gate * oscillator(self.freq, n, sample_rate, start)
+
+class WaveformTable:
+    """One period of the sum of several periodic components"""
+    def __init__(self, period):
+        self.period = period
+        self.table = np.zeros(period, dtype=np.complex64)
+
+    def add(self, component, sample_rate):
+        self.table += component.render(self.period, sample_rate).astype(np.complex64)
+
+    def add_to(self, out, start):
+        """Add the waveform for samples start..start+len(out) into out"""
+        n = len(out)
+        pos = start % self.period
+        done = 0
+        while done < n:
+            chunk = min(n - done, self.period - pos)
+            out[done:done + chunk] += self.table[pos:pos + chunk]
+            done += chunk
+            pos = 0
+
+class SignalSimulator:
+    def __init__(self, sample_rate=2.4e6, noise_level=0.1, seed=None):
+        self.sample_rate = sample_rate
+        self.noise_level = noise_level  # Standard deviation per I/Q component
+        self.rng = np.random.default_rng(seed)
+        self.components = []
+        self.position = 0  # Absolute sample index of the next output sample
+        self.tables = None
+        self.streaming = []  # Components too long-period to tabulate
+
+    @classmethod
+    def default(cls, sample_rate=2.4e6, seed=None):
+        """Simulator with the built-in demo spectrum"""
+        sim = cls(sample_rate, seed=seed)
+        sim.add_component(Tone(0, 0.5))
+        sim.add_component(AMSignal(200e3, 0.3, mod_freq=1000, depth=0.5))
+        sim.add_component(FMSignal(-400e3, 0.2, mod_freq=1000, deviation=50e3))
+        sim.add_component(PulsedSignal(600e3, 0.4, pulse_rate=10))
+        return sim
+
+    def add_component(self, component):
+        self.components.append(component)
+        self.tables = None
+
+    def set_sample_rate(self, rate):
+        self.sample_rate = rate
+        self.tables = None
+
+    def _build_tables(self):
+        """Precompute one period of every periodic component, merging
+        components into a shared table while the combined period stays small"""
+        self.tables = []
+        self.streaming = []
+        for component in self.components:
+            period = period_samples(component.frequencies(), self.sample_rate)
+            if period is None:
+                self.streaming.append(component)
+                continue
+            for i, table in enumerate(self.tables):
+                combined = lcm(table.period, period)
+                if combined <= MAX_TABLE_SIZE:
+                    if combined != table.period:
+                        merged = WaveformTable(combined)
+                        merged.table[:] = np.tile(table.table, combined // table.period)
+                        self.tables[i] = table = merged
+                    table.add(component, self.sample_rate)
+                    break
+            else:
+                table = WaveformTable(period)
+                table.add(component, self.sample_rate)
+                self.tables.append(table)
+
+    def read(self, out):
+        """Fill out (complex64) with the next len(out) samples"""
+        if self.tables is None:
+            self._build_tables()
+        n = len(out)
+
+        # Noise is generated straight into the output buffer
+        noise = out.view(np.float32)
+        self.rng.standard_normal(out=noise, dtype=np.float32)
+        noise *= self.noise_level
+
+        for table in self.tables:
+            table.add_to(out, self.position)
+        for component in self.streaming:
+            out += component.render(n, self.sample_rate, self.position).astype(np.complex64)
+
+        self.position += n
+        return out
+
+    def generate(self, num_samples):
+        """Generate num_samples into a new array"""
+        return self.read(np.empty(num_samples, dtype=np.complex64))
@@ -0,0 +1,89 @@
+import numpy as np
+
+HISTORY_FORMATS = ('uint8', 'float16')
+
+class SpectrumHistory:
+    """Circular history of spectrum rows shared by the waterfall displays.
+
+    Rows are stored newest first without ever moving old rows: each push
+    writes one row at a decrementing head index. The first view_rows rows
+    are mirrored past the end of the ring, so the latest view_rows rows are
+    always one contiguous slice that can be handed to an image item
+    without copying.
+
+    In 'uint8' format rows are quantized to 0..255 across levels, ready for
+    a 256 entry colormap; in 'float16' format they keep their dB values.
+    Memory is fixed at (depth + view_rows) * width bytes per element.
+    """
+    def __init__(self, depth=1000, width=1024, format='uint8', levels=(-100, 0), view_rows=1000):
+        if format not in HISTORY_FORMATS:
+            raise ValueError(f"Unknown history format: {format}")
+        self.depth = depth
+        self.format = format
+        self.levels = levels
+        self.view_rows = min(view_rows, depth)
+        self.rows_written = 0
+        self.resize(width)
+
+    @property
+    def display_levels(self):
+        """Levels to give an image item showing the stored values"""
+        return (0, 255) if self.format == 'uint8' else self.levels
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def resize(self, width):
+        """Start an empty history of the given row width"""
+        self.width = width
+        self.data = np.zeros((self.depth + self.view_rows, width), dtype=self.format)
+        if self.format == 'float16':
+            self.data.fill(self.levels[0])
+        self.scratch = np.empty(width, dtype=np.float32)
+        self.head = 0
+        self.count = 0
+
+    def clear(self):
+        self.resize(self.width)
+
+    def push(self, power_db):
+        """Add a spectrum row (dB), restarting the history if its width changed"""
+        if len(power_db) != self.width:
+            self.resize(len(power_db))
+        self.head = (self.head - 1) % self.depth
+        row = self.data[self.head]
+        if self.format == 'uint8':
+            lo, hi = self.levels
+            np.subtract(power_db, lo, out=self.scratch)
+            self.scratch *= 255.0 / (hi - lo)
+            np.clip(self.scratch, 0, 255, out=self.scratch)
+            np.copyto(row, self.scratch, casting='unsafe')
+        else:
+            np.copyto(row, power_db, casting='same_kind')
+        if self.head < self.view_rows:
+            self.data[self.head + self.depth] = row
+        self.count = min(self.count + 1, self.depth)
+        self.rows_written += 1
+
+    def view(self, rows=None):
+        """The latest rows, newest first, as a view into the ring (no copy)"""
+        rows = self.view_rows if rows is None else min(rows, self.view_rows)
+        return self.data[self.head:self.head + rows]
+
+    def latest(self, rows=None):
+        """Up to depth latest rows, newest first; copies when they wrap"""
+        rows = self.count if rows is None else min(rows, self.count)
+        if rows <= self.view_rows:
+            return self.view(rows)
+        end = self.head + rows
+        if end <= self.depth + self.view_rows:
+            return self.data[self.head:end]
+        return np.concatenate((self.data[self.head:self.depth], self.data[:end - self.depth]))
+
+    def to_db(self, rows):
+        """Convert stored rows back to dB"""
+        if self.format == 'float16':
+            return rows.astype(np.float32)
+        lo, hi = self.levels
+        return rows.astype(np.float32) * ((hi - lo) / 255.0) + lo
@@ -0,0 +1,148 @@
+import threading
+import time
+import numpy as np
+
+class SweepScheduler:
+    """Steps a source across a frequency range and stitches the hops into
+    one panoramic spectrum.
+
+    Each hop keeps only the central part of its PSD, where the receiver's
+    filter roll-off doesn't distort the level. Adjacent hops are spaced
+    so the kept parts butt together exactly.
+    """
+    def __init__(self, source, processor, start_freq, stop_freq, dwell_samples=64*1024,
+                 settle_time=0.005, usable_fraction=0.8, overlap=0.0):
+        self.source = source
+        self.processor = processor
+        self.start_freq = start_freq
+        self.stop_freq = stop_freq
+        self.dwell_samples = dwell_samples
+        self.settle_time = settle_time  # Tuner settling, discarded after every retune
+        self.usable_fraction = usable_fraction  # Part of the sample rate kept per hop
+        self.overlap = overlap  # Extra fraction of each hop trimmed and re-covered by the next
+
+        self.hops = 0
+        self.sweeps = 0
+        self.last_sweep_time = 0.0
+        self.last_stitch_time = 0.0
+        self.last_retune_time = 0.0
+        self.hop_rate = 0.0
+        self.configure()
+
+    def configure(self):
+        """Work out hop centers and the panorama layout"""
+        fs = self.source.sample_rate
+        segment_size = self.processor.segment_size
+        self.bin_width = fs / segment_size
+        step = fs * self.usable_fraction * (1 - self.overlap)
+        self.bins_per_hop = max(2, int(step / self.bin_width) // 2 * 2)
+        self.step = self.bins_per_hop * self.bin_width
+
+        span = self.stop_freq - self.start_freq
+        self.num_hops = max(1, int(np.ceil(span / self.step)))
+        self.hop_centers = self.start_freq + self.step * (np.arange(self.num_hops) + 0.5)
+
+        # Bins kept from each hop's shifted PSD
+        first = segment_size // 2 - self.bins_per_hop // 2
+        self.keep = slice(first, first + self.bins_per_hop)
+
+        total = self.num_hops * self.bins_per_hop
+        self.freq = self.start_freq + np.arange(total) * self.bin_width
+        self.power = np.full(total, -200.0, dtype=np.float32)
+        # Plus whatever the source still has buffered from the previous hop
+        flush = int(getattr(self.source, 'retune_flush_samples', 0))
+        self.settle = np.empty(max(1, flush + int(self.settle_time * fs)), dtype=np.complex64)
+        self.dwell = np.empty(self.dwell_samples, dtype=np.complex64)
+
+    def estimate_sweep_time(self):
+        """Acquisition time of one sweep, ignoring processing and retune latency"""
+        samples = self.num_hops * (len(self.settle) + self.dwell_samples)
+        return samples / self.source.sample_rate
+
+    def _read(self, buffer):
+        if hasattr(self.source, 'read_samples'):
+            return self.source.read_samples(buffer)
+        samples = self.source.get_samples(len(buffer))
+        if samples is not None:
+            buffer[:len(samples)] = samples
+            return buffer[:len(samples)]
+        return None
+
+    def sweep(self, running=None):
+        """Run one sweep and return (freq, power) of the panorama.
+
+        The arrays are reused by the next sweep.
+        """
+        sweep_start = time.perf_counter()
+        stitch_time = 0.0
+        retune_time = 0.0
+        for i, center in enumerate(self.hop_centers):
+            if running is not None and not running.is_set():
+                break
+            t0 = time.perf_counter()
+            self.source.set_center_freq(center)
+            self._read(self.settle)  # Discard samples taken while the tuner settles
+            retune_time += time.perf_counter() - t0
+
+            samples = self._read(self.dwell)
+            if samples is None:
+                continue
+
+            t0 = time.perf_counter()
+            _, psd = self.processor.compute_psd(samples, update_traces=False)
+            start = i * self.bins_per_hop
+            self.power[start:start + self.bins_per_hop] = psd[self.keep]
+            stitch_time += time.perf_counter() - t0
+            self.hops += 1
+
+        self.sweeps += 1
+        self.last_sweep_time = time.perf_counter() - sweep_start
+        self.last_stitch_time = stitch_time
+        self.last_retune_time = retune_time
+        self.hop_rate = self.num_hops / self.last_sweep_time if self.last_sweep_time else 0.0
+        return self.freq, self.power
+
+    def get_stats(self):
+        return {
+            'num_hops': self.num_hops,
+            'hops': self.hops,
+            'sweeps': self.sweeps,
+            'hop_rate': self.hop_rate,
+            'sweep_time': self.last_sweep_time,
+            'stitch_time': self.last_stitch_time,
+            'retune_time': self.last_retune_time,
+            'estimated_sweep_time': self.estimate_sweep_time(),
+        }
+
+class SweepThread(threading.Thread):
+    """Sweeps continuously in the background, keeping the latest panorama"""
+    def __init__(self, scheduler):
+        super().__init__(name="sweep", daemon=True)
+        self.scheduler = scheduler
+        self.running = threading.Event()
+        self.lock = threading.Lock()
+        self.latest = None
+        self.sequence = 0  # Increments with every completed sweep
+
+    def run(self):
+        self.running.set()
+        while self.running.is_set():
+            freq, power = self.scheduler.sweep(self.running)
+            with self.lock:
+                if self.latest is None:
+                    self.latest = (freq.copy(), power.copy())
+                else:
+                    self.latest[1][:] = power
+                self.sequence += 1
+
+    def get_latest(self):
+        """Copy of the latest panorama, or (None, None) before the first sweep"""
+        with self.lock:
+            if self.latest is None:
+                return None, None
+            return self.latest[0], self.latest[1].copy()
+
+    def stop(self, timeout=2.0):
+        self.running.clear()
+        if self.is_alive():
+            self.join(timeout)
@@ -0,0 +1,148 @@
+from enum import Enum
+import numpy as np
+
+class TraceMode(Enum):
+    CLEAR_WRITE = "Clear/Write"
+    MAX_HOLD = "Max Hold"
+    MIN_HOLD = "Min Hold"
+    PEAK_HOLD = "Peak Hold"  # Max hold that decays towards the live trace
+    AVERAGE = "Average"  # Linear power average over N frames
+    EXP_AVERAGE = "Exp Average"  # Exponential average of linear power
+    RMS_AVERAGE = "RMS Average"  # Block RMS over N frames
+
+# Modes that work on linear power rather than dB
+LINEAR_MODES = (TraceMode.AVERAGE, TraceMode.EXP_AVERAGE, TraceMode.RMS_AVERAGE)
+
+class Trace:
+    def __init__(self, mode=TraceMode.CLEAR_WRITE, count=10, decay=0.5):
+        self.mode = mode
+        self.count = count  # Averaging length in frames
+        self.decay = decay  # Peak hold decay in dB per frame
+        self.enabled = True
+        self.data = None  # Displayed trace in dB (float32)
+        self.accumulator = None  # Linear power state for averaging modes
+        self.frames = 0
+
+    def set_mode(self, mode):
+        """Change trace mode and restart accumulation"""
+        if mode != self.mode:
+            self.mode = mode
+            self.reset()
+
+    def set_count(self, count):
+        """Set the averaging length"""
+        self.count = max(1, int(count))
+
+    def reset(self):
+        self.frames = 0
+
+    def _allocate(self, size):
+        self.data = np.empty(size, dtype=np.float32)
+        if self.mode in LINEAR_MODES:
+            self.accumulator = np.empty(size, dtype=np.float32)
+        self.frames = 0
+
+    def update(self, power_db, linear):
+        """Update the trace in place from one frame.
+
+        linear is a callable returning the frame in linear power; it is
+        only called by the averaging modes.
+        """
+        if self.data is None or len(self.data) != len(power_db) or (
+                self.mode in LINEAR_MODES and self.accumulator is None):
+            self._allocate(len(power_db))
+
+        data = self.data
+        mode = self.mode
+        first = self.frames == 0
+        self.frames += 1
+
+        if mode == TraceMode.CLEAR_WRITE or (first and mode not in LINEAR_MODES):
+            np.copyto(data, power_db, casting='unsafe')
+        elif mode == TraceMode.MAX_HOLD:
+            np.maximum(data, power_db, out=data, casting='unsafe')
+        elif mode == TraceMode.MIN_HOLD:
+            np.minimum(data, power_db, out=data, casting='unsafe')
+        elif mode == TraceMode.PEAK_HOLD:
+            data -= self.decay
+            np.maximum(data, power_db, out=data, casting='unsafe')
+        else:
+            self._update_average(linear())
+        return data
+
+    def _update_average(self, power):
+        acc = self.accumulator
+        mode = self.mode
+        if mode == TraceMode.AVERAGE:
+            # Running mean until count frames, then a 1/count weighted average
+            if self.frames == 1:
+                np.copyto(acc, power, casting='unsafe')
+            else:
+                self._blend(acc, power, 1.0 / min(self.frames, self.count))
+            self._to_db(acc)
+        elif mode == TraceMode.EXP_AVERAGE:
+            if self.frames == 1:
+                np.copyto(acc, power, casting='unsafe')
+            else:
+                self._blend(acc, power, 2.0 / (self.count + 1))
+            self._to_db(acc)
+        elif mode == TraceMode.RMS_AVERAGE:
+            # Sum power over a block of count frames and publish the RMS
+            # level when the block completes
+            block_pos = (self.frames - 1) % self.count
+            if block_pos == 0:
+                np.copyto(acc, power, casting='unsafe')
+            else:
+                acc += power
+            if block_pos == self.count - 1 or self.frames == 1:
+                self._to_db(acc, scale=1.0 / (block_pos + 1))
+
+    def _blend(self, acc, power, weight):
+        """acc = (1 - weight) * acc + weight * power, without temporaries"""
+        acc -= power
+        acc *= 1.0 - weight
+        acc += power
+
+    def _to_db(self, power, scale=1.0):
+        data = self.data
+        np.multiply(power, scale, out=data)
+        np.maximum(data, 1e-20, out=data)
+        np.log10(data, out=data)
+        data *= 10
+
+class TraceEngine:
+    def __init__(self):
+        self.traces = []
+        self.linear = None  # Shared linear-power copy of the current frame
+        self._linear_valid = False
+
+    def add_trace(self, mode=TraceMode.CLEAR_WRITE, **kwargs):
+        """Add a trace driven by the same FFT results"""
+        trace = Trace(mode, **kwargs)
+        self.traces.append(trace)
+        return trace
+
+    def remove_trace(self, trace):
+        self.traces.remove(trace)
+
+    def reset(self):
+        """Restart all holds and averages"""
+        for trace in self.traces:
+            trace.reset()
+
+    def update(self, power_db):
+        """Update every enabled trace from one frame"""
+        self._linear_valid = False
+        for trace in self.traces:
+            if trace.enabled:
+                trace.update(power_db, lambda: self._get_linear(power_db))
+
+    def _get_linear(self, power_db):
+        """Convert the frame to linear power once, however many traces need it"""
+        if not self._linear_valid:
+            if self.linear is None or len(self.linear) != len(power_db):
+                self.linear = np.empty(len(power_db), dtype=np.float32)
+            np.multiply(power_db, 0.1, out=self.linear, casting='unsafe')
+            np.power(10.0, self.linear, out=self.linear, casting='unsafe')
+            self._linear_valid = True
+        return self.linear
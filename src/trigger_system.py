@@ -11,63 +11,169 @@ class TriggerMode(Enum):
     NORMAL = "Normal"
     SINGLE = "Single"
 
+# Per-frame statistics kept in the history ring (columns of stats)
+STATISTICS = ('max', 'mean', 'occupancy')
+
 class TriggerSystem:
+    """Frame trigger evaluated on per-frame statistics of a frequency band.
+
+    Each frame is reduced to three numbers over the selected band: max
+    power, mean power and occupancy (fraction of bins above
+    occupancy_level). These go into a fixed-size numpy ring, and the
+    trigger conditions are evaluated on the chosen statistic for whole
+    batches of frames at once. Edge and pattern state is carried between
+    batches, so splitting frames into batches doesn't change the result.
+    """
     def __init__(self):
         self.enabled = False
         self.type = TriggerType.LEVEL
         self.mode = TriggerMode.AUTO
-        self.level = -50  # dB
+        self.level = -50  # dB (or a 0..1 fraction for occupancy)
         self.edge_slope = 'rising'  # or 'falling'
-        self.pattern = []  # For pattern triggering
+        self.pattern = []  # For pattern triggering: above/below level per frame
         self.holdoff = 0  # seconds
-        self.last_trigger_time = 0
-        self.pre_trigger_buffer = []
+        self.last_trigger_time = float('-inf')
+        self.statistic = 'max'  # Which of STATISTICS the conditions test
+        self.band = None  # (start, stop) in the units of freq, None for all bins
+        self.occupancy_level = -80  # dB a bin must exceed to count as occupied
         self.buffer_size = 1000
-        
-    def check_trigger(self, time, freq, power):
-        """Check if trigger conditions are met"""
-        if not self.enabled:
-            return True
-            
-        if time - self.last_trigger_time < self.holdoff:
-            return False
-            
+
+        self.times = np.zeros(self.buffer_size)
+        self.stats = np.zeros((self.buffer_size, len(STATISTICS)), dtype=np.float32)
+        self.frames_seen = 0  # Absolute index of the next frame
+        self.trigger_count = 0
+        self.prev_value = None  # Statistic of the last frame, for edges
+        self.recent_above = np.zeros(0, dtype=bool)  # Last len(pattern)-1 flags
+        self._band_key = None
+        self._band_slice = slice(None)
+
+    def set_band(self, start, stop):
+        """Restrict the statistics to start..stop (None for the whole trace)"""
+        self.band = None if start is None else (start, stop)
+        self._band_key = None
+
+    def reset(self):
+        """Forget history and edge/pattern state"""
+        self.frames_seen = 0
+        self.prev_value = None
+        self.recent_above = np.zeros(0, dtype=bool)
+        self.last_trigger_time = float('-inf')
+
+    def _band_bins(self, freq):
+        key = (len(freq), freq[0], freq[-1], self.band)
+        if key != self._band_key:
+            if self.band is None:
+                self._band_slice = slice(None)
+            else:
+                lo, hi = np.searchsorted(freq, self.band)
+                self._band_slice = slice(lo, max(hi, lo + 1))
+            self._band_key = key
+        return self._band_slice
+
+    def compute_statistics(self, freq, powers):
+        """(frames, 3) max/mean/occupancy of each row of powers within the band"""
+        band = powers[:, self._band_bins(freq)]
+        stats = np.empty((len(powers), len(STATISTICS)), dtype=np.float32)
+        stats[:, 0] = band.max(axis=1)
+        stats[:, 1] = band.mean(axis=1)
+        stats[:, 2] = np.count_nonzero(band > self.occupancy_level, axis=1) / band.shape[1]
+        return stats
+
+    def _store(self, times, stats):
+        """Append a batch to the history ring"""
+        n = len(times)
+        if n > self.buffer_size:
+            times, stats = times[-self.buffer_size:], stats[-self.buffer_size:]
+            start = self.frames_seen + n - self.buffer_size
+        else:
+            start = self.frames_seen
+        positions = np.arange(start, start + len(times)) % self.buffer_size
+        self.times[positions] = times
+        self.stats[positions] = stats
+
+    def history(self, frames=None):
+        """(times, stats) of the latest frames held in the ring, oldest first"""
+        held = min(self.frames_seen, self.buffer_size)
+        frames = held if frames is None else min(frames, held)
+        positions = np.arange(self.frames_seen - frames, self.frames_seen) % self.buffer_size
+        return self.times[positions], self.stats[positions]
+
+    def _candidates(self, values):
+        """Frames of the batch meeting the trigger condition, ignoring holdoff"""
+        above = values > self.level
         if self.type == TriggerType.LEVEL:
-            return self._check_level_trigger(power)
+            fired = above
         elif self.type == TriggerType.EDGE:
-            return self._check_edge_trigger(power)
+            prev = np.empty_like(values)
+            prev[0] = values[0] if self.prev_value is None else self.prev_value
+            prev[1:] = values[:-1]
+            if self.edge_slope == 'rising':
+                fired = (prev <= self.level) & above
+            else:
+                fired = (prev >= self.level) & (values < self.level)
+            if self.prev_value is None:
+                fired[0] = False
         elif self.type == TriggerType.PATTERN:
-            return self._check_pattern_trigger(power)
-            
-    def _check_level_trigger(self, power):
-        """Check level trigger condition"""
-        return np.any(power > self.level)
-        
-    def _check_edge_trigger(self, power):
-        """Check edge trigger condition"""
-        if len(self.pre_trigger_buffer) < 2:
-            self.pre_trigger_buffer.append(power)
-            return False
-            
-        prev_power = self.pre_trigger_buffer[-1]
-        if self.edge_slope == 'rising':
-            triggered = prev_power <= self.level and power > self.level
+            pattern = np.asarray(self.pattern, dtype=bool)
+            length = len(pattern)
+            if length == 0:
+                return np.zeros(0, dtype=np.intp)
+            recent = self.recent_above[max(0, len(self.recent_above) - (length - 1)):]
+            flags = np.concatenate((recent, above))
+            # Compare the window ending at each frame of the batch (its start
+            # may lie in earlier batches); frames without a full window can't match
+            fired = np.zeros(len(above), dtype=bool)
+            if len(flags) >= length:
+                windows = np.lib.stride_tricks.sliding_window_view(flags, length)
+                first = length - 1 - len(recent)
+                fired[first:] = (windows == pattern).all(axis=1)
+            self.recent_above = flags[max(0, len(flags) - (length - 1)):]
         else:
-            triggered = prev_power >= self.level and power < self.level
-            
-        self.pre_trigger_buffer.append(power)
-        if len(self.pre_trigger_buffer) > self.buffer_size:
-            self.pre_trigger_buffer.pop(0)
-            
-        return triggered
-        
-    def _check_pattern_trigger(self, power):
-        """Check pattern trigger condition"""
-        self.pre_trigger_buffer.append(power > self.level)
-        if len(self.pre_trigger_buffer) > len(self.pattern):
-            self.pre_trigger_buffer.pop(0)
-            
-        if len(self.pre_trigger_buffer) == len(self.pattern):
-            return all(a == b for a, b in zip(self.pre_trigger_buffer, self.pattern))
-            
-        return False 
\ No newline at end of file
+            fired = np.zeros(len(values), dtype=bool)
+        self.prev_value = values[-1]
+        return np.flatnonzero(fired)
+
+    def _apply_holdoff(self, candidates, times):
+        """Keep candidates at least holdoff seconds after the previous trigger"""
+        if self.holdoff <= 0:
+            return candidates
+        cand_times = times[candidates]
+        accepted = []
+        i = np.searchsorted(cand_times, self.last_trigger_time + self.holdoff)
+        while i < len(candidates):
+            accepted.append(candidates[i])
+            i = np.searchsorted(cand_times, cand_times[i] + self.holdoff)
+        return np.asarray(accepted, dtype=np.intp)
+
+    def process(self, times, freq, powers):
+        """Add a batch of frames and evaluate the trigger on them.
+
+        times is (frames,) seconds, powers is (frames, bins) dB. Returns the
+        absolute indices (counting every frame ever processed) of the
+        frames that fired.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        powers = np.atleast_2d(powers)
+        stats = self.compute_statistics(freq, powers)
+        self._store(times, stats)
+        base = self.frames_seen
+        self.frames_seen += len(times)
+        if not self.enabled or len(times) == 0:
+            return np.zeros(0, dtype=np.intp)
+
+        values = stats[:, STATISTICS.index(self.statistic)]
+        fired = self._apply_holdoff(self._candidates(values), times)
+        if len(fired):
+            if self.mode == TriggerMode.SINGLE:
+                fired = fired[:1]
+                self.enabled = False
+            self.last_trigger_time = times[fired[-1]]
+            self.trigger_count += len(fired)
+        return fired + base
+
+    def check_trigger(self, time, freq, power):
+        """Check if trigger conditions are met for a single frame"""
+        if not self.enabled:
+            self.process([time], freq, power)
+            return True
+        return len(self.process([time], freq, power)) > 0
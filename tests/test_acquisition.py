@@ -0,0 +1,77 @@
+import numpy as np
+from src.acquisition import IQRingBuffer, AcquisitionThread
+from src.file_source import FileSource
+
+def _ramp(start, n):
+    return np.arange(start, start + n).astype(np.complex64)
+
+def test_read_wraps_around_the_end_of_the_ring():
+    ring = IQRingBuffer(capacity=8)
+    ring.write(_ramp(0, 6))
+    ring.write(_ramp(6, 6))  # Samples 8..11 wrap to the start
+    samples, seq = ring.read(5, 6)
+    assert seq == 5
+    np.testing.assert_array_equal(samples, _ramp(5, 6))
+    views = ring.views(5, 6)
+    assert len(views) == 2
+    np.testing.assert_array_equal(np.concatenate(views), _ramp(5, 6))
+
+def test_lapped_region_is_gone():
+    ring = IQRingBuffer(capacity=8)
+    ring.write(_ramp(0, 20))
+    assert ring.overwritten_since(4)
+    assert ring.views(4, 4) is None
+    # read() moves forward to the oldest data held and counts the loss
+    samples, seq = ring.read(4, 4)
+    assert seq == 12
+    np.testing.assert_array_equal(samples, _ramp(12, 4))
+    assert ring.overruns == 1 and ring.dropped_samples == 8
+
+def test_read_of_unwritten_region_returns_none():
+    ring = IQRingBuffer(capacity=8)
+    ring.write(_ramp(0, 4))
+    samples, seq = ring.read(2, 4)
+    assert samples is None and seq == 2
+
+def test_region_being_overwritten_counts_as_lost():
+    ring = IQRingBuffer(capacity=8)
+    ring.write(_ramp(0, 8))
+    # A write of 3 samples has been published but not copied in yet
+    ring.writing_seq = ring.write_seq + 3
+    assert ring.oldest_seq() == 3
+    assert ring.overwritten_since(0)
+    assert ring.views(0, 4) is None
+    samples, seq = ring.read(0, 4)
+    assert seq == 3 and ring.dropped_samples == 3
+    np.testing.assert_array_equal(samples, _ramp(3, 4))
+
+class _LappingOut(np.ndarray):
+    """Output array whose first fill lets the writer lap the ring mid-copy"""
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if self.ring is not None:
+            ring, self.ring = self.ring, None
+            ring.write(_ramp(ring.write_seq, 4))
+
+def test_writer_lapping_a_read_in_progress_is_detected():
+    ring = IQRingBuffer(capacity=8)
+    ring.write(_ramp(0, 8))
+    out = np.empty(4, dtype=np.complex64).view(_LappingOut)
+    out.ring = ring
+    samples, seq = ring.read(0, 4, out)
+    # Samples 0..3 were overwritten during the copy; the read restarts after them
+    assert seq == 4 and ring.overruns == 1 and ring.dropped_samples == 4
+    np.testing.assert_array_equal(np.asarray(samples), _ramp(4, 4))
+
+def test_acquisition_finishes_at_end_of_non_looping_file(tmp_path):
+    path = tmp_path / "iq.cf32"
+    _ramp(0, 1000).tofile(path)
+    source = FileSource(str(path), loop=False, realtime=False)
+    ring = IQRingBuffer(capacity=4096)
+    acquisition = AcquisitionThread(source, ring, block_size=256, realtime=False)
+    acquisition.start()
+    acquisition.join(2.0)
+    assert not acquisition.is_alive()
+    stats = acquisition.get_stats()
+    assert stats['finished'] and stats['errors'] == 0 and stats['samples'] == 1000
+    np.testing.assert_array_equal(ring.read(0, 1000)[0], _ramp(0, 1000))
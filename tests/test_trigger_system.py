@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from src.trigger_system import TriggerSystem, TriggerType
+
+def _pattern_trigger(pattern):
+    trigger = TriggerSystem()
+    trigger.enabled = True
+    trigger.type = TriggerType.PATTERN
+    trigger.level = -50
+    trigger.pattern = pattern
+    return trigger
+
+@pytest.mark.parametrize('pattern', [[True, True, False, True], [True, False, True, True, False]])
+def test_pattern_frame_by_frame_matches_batch(pattern):
+    above = [True, True, False, True, True, True, False, True, True, False, True, True, False]
+    powers = np.where(above, -40.0, -60.0)[:, None]
+    freq = np.array([100.0])
+    times = np.arange(len(above), dtype=float)
+
+    batch = _pattern_trigger(pattern).process(times, freq, powers)
+
+    single = _pattern_trigger(pattern)
+    fired = [i for i in range(len(above))
+             if len(single.process(times[i:i + 1], freq, powers[i:i + 1]))]
+
+    assert len(batch) > 0
+    assert fired == batch.tolist()